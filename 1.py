@@ -1,66 +1,42 @@
-import requests
-import sqlite3
 import json
 import csv
+import os
 import signal
 import sys
-import time
+import argparse
+import asyncio
 from datetime import datetime, timedelta, timezone
 
-BASE_URL = "https://api.hh.ru/vacancies"
+from hh_store import DB_PATH, VacancyStore
+from hh_throttle import THROTTLE_STATUSES, Throttle, throttled_get
+
+# HH_BASE_URL позволяет направить сборщик на локальный фейковый сервер (fake_hh_server.py)
+BASE_URL = os.environ.get("HH_BASE_URL", "https://api.hh.ru/vacancies")
 HEADERS = {"User-Agent": "Mozilla/5.0 (DataMining; contact: you@example.com)"}
 
 AREA_ID = 40          
 TARGET = 10_000       
 PER_PAGE = 100
-SLEEP = 0.35
+RPS = 3.0
+
+# Асинхронный режим: бюджет запросов в секунду и лимит одновременных запросов
+ASYNC_RPS = 5.0
+ASYNC_MAX_IN_FLIGHT = 8
+# сколько раз повторять страницу после таймаута/обрыва соединения, прежде чем пропустить её
+ASYNC_NETWORK_RETRIES = 3
 
-DB_PATH = "hh_kz.db"
 CSV_PATH = "hh_kz_export.csv"
 
 STOP = False
+THROTTLE = Throttle(rate=RPS)
 
 
 def iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat()
 
 
-def setup_db():
-    con = sqlite3.connect(DB_PATH)
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS vacancies (
-            id TEXT PRIMARY KEY,
-            payload TEXT NOT NULL
-        )
-    """)
-    con.commit()
-    return con
-
-
-def db_count(con) -> int:
-    (n,) = con.execute("SELECT COUNT(*) FROM vacancies").fetchone()
-    return int(n)
-
-
-def upsert_many(con, items):
-    cur = con.cursor()
-    inserted = 0
-    for it in items:
-        vid = str(it.get("id"))
-        if not vid:
-            continue
-        payload = json.dumps(it, ensure_ascii=False)
-        try:
-            cur.execute("INSERT INTO vacancies (id, payload) VALUES (?, ?)", (vid, payload))
-            inserted += 1
-        except sqlite3.IntegrityError:
-            pass
-    con.commit()
-    return inserted
-
-
-def request_page(date_from: datetime, date_to: datetime, page: int):
-    params = {
+def page_params(date_from: datetime, date_to: datetime, page: int) -> dict:
+    return {
         "area": AREA_ID,
         "per_page": PER_PAGE,
         "page": page,
@@ -68,7 +44,10 @@ def request_page(date_from: datetime, date_to: datetime, page: int):
         "date_to": iso(date_to),
         "order_by": "publication_time",
     }
-    r = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=25)
+
+
+def request_page(date_from: datetime, date_to: datetime, page: int):
+    r = throttled_get(THROTTLE, BASE_URL, params=page_params(date_from, date_to, page), headers=HEADERS, timeout=25)
     return r
 
 
@@ -84,25 +63,21 @@ def window_saturated(first_page_json: dict) -> bool:
     return False
 
 
-def export_csv(con):
-    rows = con.execute("SELECT payload FROM vacancies").fetchall()
-    dicts = [json.loads(p[0]) for p in rows]
-
-    keys = set()
-    for d in dicts:
-        keys.update(d.keys())
-    fieldnames = sorted(keys)
-
+def export_csv(store, path=CSV_PATH):
     def flatten(v):
         return json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
 
-    with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for d in dicts:
-            w.writerow({k: flatten(d.get(k)) for k in fieldnames})
+    n = 0
+    with store.snapshot():
+        fieldnames = store.columns()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=fieldnames)
+            w.writeheader()
+            for d in store.iter_payloads():
+                w.writerow({k: flatten(d.get(k)) for k in fieldnames})
+                n += 1
 
-    print(f"✅ Экспортировано в CSV: {CSV_PATH} | строк: {len(dicts)} | колонок: {len(fieldnames)}")
+    print(f"✅ Экспортировано в CSV: {path} | строк: {n} | колонок: {len(fieldnames)}")
 
 
 def handle_sigint(signum, frame):
@@ -112,12 +87,12 @@ def handle_sigint(signum, frame):
     signal.signal(signal.SIGINT, lambda s, f: sys.exit(1))
 
 
-def collect():
+def collect(db_path=DB_PATH, csv_path=CSV_PATH):
     global STOP
     signal.signal(signal.SIGINT, handle_sigint)
 
-    con = setup_db()
-    print(f"▶ Уже в базе: {db_count(con)}")
+    store = VacancyStore(db_path)
+    print(f"▶ Уже в базе: {store.count}")
 
     now = datetime.now(timezone.utc)
     start = now - timedelta(days=30)
@@ -125,21 +100,12 @@ def collect():
     stack = [(start, now)]
 
     try:
-        while stack and not STOP and db_count(con) < TARGET:
+        while stack and not STOP and store.count < TARGET:
             date_from, date_to = stack.pop()
 
-            if (date_to - date_from) < timedelta(hours=6):
-                pass
-
             r0 = request_page(date_from, date_to, 0)
-            if r0.status_code == 429:
-                print("⚠️ 429 Too Many Requests — жду 60 сек")
-                time.sleep(60)
-                stack.append((date_from, date_to))
-                continue
-            if r0.status_code == 403:
-                print("⚠️ 403 Forbidden — жду 120 сек (часто временный бан)")
-                time.sleep(120)
+            if r0.status_code in THROTTLE_STATUSES:
+                # троттлинг уже выдержал паузу и снизил темп — просто повторим окно
                 stack.append((date_from, date_to))
                 continue
             if r0.status_code != 200:
@@ -156,29 +122,135 @@ def collect():
 
             pages = int(data0.get("pages", 0))
             items0 = data0.get("items", [])
-            inserted = upsert_many(con, items0)
+            inserted = store.upsert_many(items0)
 
             for page in range(1, pages):
-                if STOP or db_count(con) >= TARGET:
+                if STOP or store.count >= TARGET:
                     break
                 rp = request_page(date_from, date_to, page)
                 if rp.status_code != 200:
                     print(f"⚠️ HTTP {rp.status_code} на page={page} окна {date_from.date()}→{date_to.date()} | стоп окна")
                     break
                 dp = rp.json()
-                inserted += upsert_many(con, dp.get("items", []))
-                time.sleep(SLEEP)
+                inserted += store.upsert_many(dp.get("items", []))
 
-            total = db_count(con)
+            total = store.count
             print(f"⏱ {date_from.date()} → {date_to.date()} | +{inserted} | всего: {total}/{TARGET}")
-            time.sleep(SLEEP)
 
     finally:
-        total = db_count(con)
-        print(f"💾 В базе сейчас: {total}")
-        export_csv(con)
-        con.close()
+        print(f"💾 В базе сейчас: {store.count}")
+        print(THROTTLE.report())
+        export_csv(store, csv_path)
+        store.close()
+
+
+async def collect_async(db_path=DB_PATH, csv_path=CSV_PATH, rps=ASYNC_RPS, max_in_flight=ASYNC_MAX_IN_FLIGHT):
+    """
+    Тот же обход окон, что и в collect(), но окна делятся и страницы качаются конкурентно.
+    Насыщенное окно (window_saturated) так же делится пополам, пока оно длиннее 6 часов.
+    """
+    import aiohttp
+
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    store = VacancyStore(db_path)
+    print(f"▶ Уже в базе: {store.count} | async: {rps} rps, в полёте ≤ {max_in_flight}")
+
+    throttle = Throttle(rate=rps, max_rate=rps)
+    in_flight = asyncio.Semaphore(max_in_flight)
+
+    def done() -> bool:
+        return STOP or store.count >= TARGET
+
+    async def fetch(session, date_from, date_to, page):
+        """(status, json); при сетевом сбое после ASYNC_NETWORK_RETRIES повторов — (None, None)."""
+        failures = 0
+        while True:
+            await throttle.wait_async()
+            try:
+                async with in_flight:
+                    async with session.get(BASE_URL, params=page_params(date_from, date_to, page)) as r:
+                        status = r.status
+                        retry_after = r.headers.get("Retry-After")
+                        data = await r.json(content_type=None) if status == 200 else None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                failures += 1
+                if failures > ASYNC_NETWORK_RETRIES:
+                    print(f"⚠️ {type(e).__name__} на page={page}: повторы исчерпаны")
+                    return None, None
+                await asyncio.sleep(min(throttle.max_backoff, throttle.backoff * 2 ** (failures - 1)))
+                continue
+            if status in THROTTLE_STATUSES:
+                throttle.on_throttled(status, retry_after)
+                continue
+            throttle.on_success()
+            return status, data
+
+    async def crawl_window(session, date_from, date_to):
+        if done():
+            return
+
+        status, data0 = await fetch(session, date_from, date_to, 0)
+        if status != 200:
+            print(f"⚠️ HTTP {status or '—'} на окне {date_from.date()} → {date_to.date()} | пропускаю")
+            return
+
+        if window_saturated(data0) and (date_to - date_from) > timedelta(hours=6):
+            mid = date_from + (date_to - date_from) / 2
+            await asyncio.gather(
+                crawl_window(session, date_from, mid),
+                crawl_window(session, mid, date_to),
+            )
+            return
+
+        pages = int(data0.get("pages", 0))
+        inserted = store.upsert_many(data0.get("items", []))
+
+        async def crawl_page(page):
+            if done():
+                return 0
+            status, dp = await fetch(session, date_from, date_to, page)
+            if status != 200:
+                print(f"⚠️ HTTP {status or '—'} на page={page} окна {date_from.date()}→{date_to.date()} | пропускаю страницу")
+                return 0
+            return store.upsert_many(dp.get("items", []))
+
+        inserted += sum(await asyncio.gather(*(crawl_page(p) for p in range(1, pages))))
+        print(f"⏱ {date_from.date()} → {date_to.date()} | +{inserted} | всего: {store.count}/{TARGET}")
+
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=30)
+
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+    timeout = aiohttp.ClientTimeout(total=25)
+    try:
+        async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout) as session:
+            await crawl_window(session, start, now)
+    finally:
+        print(f"💾 В базе сейчас: {store.count}")
+        print(throttle.report())
+        export_csv(store, csv_path)
+        store.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Сбор вакансий hh.ru в SQLite с экспортом в CSV")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="конкурентный сбор через aiohttp")
+    parser.add_argument("--rps", type=float, default=ASYNC_RPS, help="бюджет запросов в секунду (async)")
+    parser.add_argument("--max-in-flight", type=int, default=ASYNC_MAX_IN_FLIGHT, help="одновременных запросов (async)")
+    parser.add_argument("--export-only", action="store_true", help="только выгрузить CSV из базы (можно во время сбора)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--csv", default=CSV_PATH)
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    collect()
+    args = parse_args()
+    if args.export_only:
+        store = VacancyStore(args.db)
+        export_csv(store, args.csv)
+        store.close()
+    elif args.use_async:
+        asyncio.run(collect_async(args.db, args.csv, args.rps, args.max_in_flight))
+    else:
+        collect(args.db, args.csv)
@@ -1,16 +1,19 @@
-import requests
-import csv
-import os
 from datetime import datetime, timedelta
 
+from hh_sink import CsvSink
+from hh_throttle import Throttle, throttled_get
+
 # ---------------- НАСТРОЙКИ ----------------
 BASE_URL = "https://api.hh.ru/vacancies"
 OUTPUT_FILE = "hh_kz_daily.csv"
 AREA_ID = 40             
 PER_PAGE = 100
 MAX_EMPTY_PAGES = 3       
+RPS = 3.0
 # ------------------------------------------
 
+THROTTLE = Throttle(rate=RPS)
+
 
 def flatten(v):
     if isinstance(v, (dict, list)):
@@ -18,30 +21,9 @@ def flatten(v):
     return v
 
 
-def load_existing_ids():
-    if not os.path.exists(OUTPUT_FILE):
-        return set()
-    with open(OUTPUT_FILE, encoding="utf-8") as f:
-        return {row["id"] for row in csv.DictReader(f)}
-
-
-def save_rows(rows):
-    if not rows:
-        return
-
-    keys = set()
-    for r in rows:
-        keys.update(r.keys())
-
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=sorted(keys))
-        writer.writeheader()
-        writer.writerows(rows)
-
-
 def collect():
-    seen_ids = load_existing_ids()
-    all_rows = []
+    sink = CsvSink(OUTPUT_FILE)
+    collected = 0
 
     today = datetime.utcnow().date()
     print(f"▶ Старт сбора с {today}")
@@ -52,6 +34,7 @@ def collect():
 
         page = 0
         empty_pages = 0
+        day_rows = {}
 
         while True:
             params = {
@@ -61,7 +44,7 @@ def collect():
                 "per_page": PER_PAGE
             }
 
-            r = requests.get(BASE_URL, params=params)
+            r = throttled_get(THROTTLE, BASE_URL, params=params)
             if r.status_code != 200:
                 print("⚠️ HTTP", r.status_code)
                 break
@@ -72,9 +55,8 @@ def collect():
 
             new_count = 0
             for it in items:
-                if it["id"] not in seen_ids:
-                    seen_ids.add(it["id"])
-                    all_rows.append({k: flatten(v) for k, v in it.items()})
+                if it["id"] not in sink and it["id"] not in day_rows:
+                    day_rows[it["id"]] = {k: flatten(v) for k, v in it.items()}
                     new_count += 1
 
             print(f"📦 +{new_count}")
@@ -90,9 +72,10 @@ def collect():
 
             page += 1
 
-        save_rows(all_rows)
+        collected += sink.append(day_rows.values())
 
-    print(f"\n✅ Готово! Всего вакансий: {len(all_rows)}")
+    print(f"\n✅ Готово! Новых вакансий: {collected}, всего в {OUTPUT_FILE}: {len(sink)}")
+    print(THROTTLE.report())
 
 
 if __name__ == "__main__":
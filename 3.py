@@ -1,12 +1,16 @@
-import requests
 import csv
 import os
 from datetime import datetime, timedelta
 
+from hh_throttle import Throttle, throttled_get
+
 BASE_URL = "https://api.hh.ru/vacancies"
 OUTPUT = "hh_daily.csv"
 AREA_ID = 40
 PER_PAGE = 100
+RPS = 3.0
+
+THROTTLE = Throttle(rate=RPS)
 
 
 def flatten(v):
@@ -40,7 +44,7 @@ def collect():
             "per_page": PER_PAGE,
         }
 
-        r = requests.get(BASE_URL, params=params)
+        r = throttled_get(THROTTLE, BASE_URL, params=params)
         if r.status_code != 200:
             print("❌ HTTP", r.status_code)
             break
@@ -57,6 +61,7 @@ def collect():
 
     save_rows(rows)
     print(f"✅ Готово! Всего {len(rows)} вакансий")
+    print(THROTTLE.report())
 
 
 if __name__ == "__main__":
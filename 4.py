@@ -1,40 +1,25 @@
-import requests
-import csv
-import os
 import json
 from datetime import datetime, timedelta
 
+from hh_sink import CsvSink
+from hh_throttle import Throttle, throttled_get
+
 BASE_URL = "https://api.hh.ru/vacancies"
 OUTPUT = "hh_daily_kz.csv"
 AREA_ID = 40          
 PER_PAGE = 100
+RPS = 3.0
+
+THROTTLE = Throttle(rate=RPS)
 
 
 def flatten(v):
     return json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
 
 
-def load_existing_ids():
-    if not os.path.exists(OUTPUT):
-        return set()
-    with open(OUTPUT, encoding="utf-8") as f:
-        return {row["id"] for row in csv.DictReader(f)}
-
-
-def save_rows(rows):
-    if not rows:
-        return
-    exists = os.path.exists(OUTPUT)
-    with open(OUTPUT, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        if not exists:
-            writer.writeheader()
-        writer.writerows(rows)
-
-
 def collect_by_day(days_back=60):
-    seen_ids = load_existing_ids()
-    print(f"▶ Уже собрано: {len(seen_ids)}")
+    sink = CsvSink(OUTPUT)
+    print(f"▶ Уже собрано: {len(sink)}")
 
     today = datetime.utcnow().date()
 
@@ -43,7 +28,7 @@ def collect_by_day(days_back=60):
         print(f"\n📅 Сбор за {day}")
 
         page = 0
-        new_rows = []
+        new_rows = {}
 
         while True:
             params = {
@@ -54,7 +39,7 @@ def collect_by_day(days_back=60):
                 "per_page": PER_PAGE
             }
 
-            r = requests.get(BASE_URL, params=params)
+            r = throttled_get(THROTTLE, BASE_URL, params=params)
             if r.status_code != 200:
                 print("⚠️ HTTP", r.status_code)
                 break
@@ -64,19 +49,19 @@ def collect_by_day(days_back=60):
                 break
 
             for it in items:
-                if it["id"] not in seen_ids:
-                    seen_ids.add(it["id"])
-                    new_rows.append({k: flatten(v) for k, v in it.items()})
+                if it["id"] not in sink and it["id"] not in new_rows:
+                    new_rows[it["id"]] = {k: flatten(v) for k, v in it.items()}
 
             page += 1
 
         if new_rows:
-            save_rows(new_rows)
+            sink.append(new_rows.values())
             print(f"✅ {len(new_rows)} вакансий сохранено")
         else:
             print("ℹ️ новых вакансий нет")
 
     print("\n🎉 Готово! Все данные сохранены.")
+    print(THROTTLE.report())
 
 
 if __name__ == "__main__":
@@ -1,19 +1,20 @@
-import requests
-import csv
 import json
-import os
-import time
 from datetime import datetime, timedelta
 
+from hh_sink import CsvSink
+from hh_throttle import THROTTLE_STATUSES, Throttle, throttled_get
+
 BASE_URL = "https://api.hh.ru/vacancies"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
 OUTPUT_FILE = "hh_kz_data.csv"
 TARGET = 50_000       
 PER_PAGE = 100
-SLEEP = 0.4            
+RPS = 2.5
 AREA_ID = 40          
 
+THROTTLE = Throttle(rate=RPS)
+
 
 
 def flatten(v):
@@ -22,42 +23,18 @@ def flatten(v):
     return v
 
 
-def load_existing():
-    if not os.path.exists(OUTPUT_FILE):
-        return [], set()
-
-    with open(OUTPUT_FILE, encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    ids = {r["id"] for r in rows if "id" in r}
-    return rows, ids
-
-
-def save_all(rows):
-    if not rows:
-        return
-
-    keys = set()
-    for r in rows:
-        keys.update(r.keys())
-
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=sorted(keys))
-        writer.writeheader()
-        writer.writerows(rows)
-
-
-
 def collect():
-    rows, seen_ids = load_existing()
-    print(f"▶ Уже собрано: {len(rows)}")
+    sink = CsvSink(OUTPUT_FILE)
+    print(f"▶ Уже собрано: {len(sink)}")
 
     end = datetime.utcnow()
     start = end - timedelta(days=7)
 
-    while len(rows) < TARGET:
+    while len(sink) < TARGET:
         print(f"\n⏱ Период: {start.date()} → {end.date()}")
 
         page = 0
+        period_rows = {}
         while True:
             params = {
                 "area": AREA_ID,
@@ -66,16 +43,16 @@ def collect():
                 "date_from": start.isoformat(),
             }
 
-            r = requests.get(BASE_URL, params=params, headers=HEADERS)
+            r = throttled_get(THROTTLE, BASE_URL, params=params, headers=HEADERS)
 
             if r.status_code == 400:
                 print("⚠️ 400 — уменьшаем окно")
                 break
 
-            if r.status_code == 429:
-                print("⏳ 429 Too Many Requests — жду 60 сек")
-                time.sleep(60)
-                continue
+            if r.status_code in THROTTLE_STATUSES:
+                # троттлинг исчерпал повторы: сохраняем что есть и идём к следующему периоду
+                print(f"⏳ HTTP {r.status_code} не проходит после повторов — переход к следующему периоду")
+                break
 
             if r.status_code != 200:
                 print("❌ Ошибка:", r.status_code)
@@ -87,25 +64,25 @@ def collect():
 
             new = 0
             for it in items:
-                if it["id"] not in seen_ids:
-                    seen_ids.add(it["id"])
-                    rows.append({k: flatten(v) for k, v in it.items()})
+                if it["id"] not in sink and it["id"] not in period_rows:
+                    period_rows[it["id"]] = {k: flatten(v) for k, v in it.items()}
                     new += 1
 
-            print(f"📦 +{new} | всего: {len(rows)}")
+            total = len(sink) + len(period_rows)
+            print(f"📦 +{new} | всего: {total}")
 
-            if len(rows) >= TARGET:
+            if total >= TARGET:
                 break
 
             page += 1
-            time.sleep(SLEEP)
 
-        save_all(rows)
+        sink.append(period_rows.values())
 
         end = start
         start -= timedelta(days=7)
 
-    print(f"\n✅ ГОТОВО! Всего сохранено: {len(rows)}")
+    print(f"\n✅ ГОТОВО! Всего сохранено: {len(sink)}")
+    print(THROTTLE.report())
 
 
 if __name__ == "__main__":
@@ -113,3 +90,4 @@ if __name__ == "__main__":
         collect()
     except KeyboardInterrupt:
         print("\n⛔ Остановка пользователем — сохраняем...")
+        print(THROTTLE.report())
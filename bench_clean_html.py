@@ -0,0 +1,98 @@
+"""
+Бенчмарк: hh_html.html_to_text против BeautifulSoup(...).get_text(" ", strip=True).
+
+    python3 bench_clean_html.py                       # разметка в стиле hh.ru из hh_almaty_2000_FINAL_FULL_LOCAL.csv
+    python3 bench_clean_html.py --fixtures saved_html # каталог с сохранёнными описаниями *.html
+    python3 bench_clean_html.py --workers 4           # плюс прогон на пуле процессов
+
+Сначала проверяет, что на всех описаниях текст совпадает символ в символ,
+затем печатает время на описание для каждого пути.
+"""
+import argparse
+import csv
+import html
+import random
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from hh_html import _fast_text, html_to_text, html_to_text_many
+
+SOURCE_CSV = "hh_almaty_2000_FINAL_FULL_LOCAL.csv"
+
+
+def bs_text(markup):
+    return BeautifulSoup(markup, "html.parser").get_text(" ", strip=True)
+
+
+def hh_markup(text: str, rnd: random.Random) -> str:
+    """Оборачивает плоское описание в типичную разметку hh.ru: абзацы, списки, strong, сущности."""
+    sentences = [s.strip() for s in text.replace(";", ".").split(".") if s.strip()]
+    parts = []
+    i = 0
+    while i < len(sentences):
+        if rnd.random() < 0.4:
+            head, items = sentences[i], sentences[i + 1:i + 1 + rnd.randint(2, 5)]
+            parts.append(f"<p><strong>{html.escape(head, quote=False)}:</strong></p>")
+            parts.append("<ul>" + "".join(f"<li>{html.escape(s, quote=False)};</li>" for s in items) + "</ul>")
+            i += 1 + len(items)
+        else:
+            parts.append(f"<p>{html.escape(sentences[i], quote=False)}.&nbsp;</p>")
+            i += 1
+        if rnd.random() < 0.2:
+            parts.append("<br />")
+    return "".join(parts)
+
+
+def load_fixtures(fixtures_dir, limit):
+    if fixtures_dir:
+        paths = sorted(Path(fixtures_dir).glob("*.html"))[:limit]
+        return [p.read_text(encoding="utf-8") for p in paths]
+    csv.field_size_limit(1 << 30)
+    rnd = random.Random(42)
+    with open(SOURCE_CSV, encoding="utf-8") as f:
+        descs = [r["description"] for r in csv.DictReader(f) if r.get("description")]
+    return [hh_markup(d, rnd) for d in descs[:limit]]
+
+
+def timed(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(docs)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="каталог с *.html описаниями")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="процессов для html_to_text_many")
+    args = parser.parse_args()
+
+    docs = load_fixtures(args.fixtures, args.limit)
+    mb = sum(len(d.encode("utf-8")) for d in docs) / 1e6
+    fast_share = sum(_fast_text(d) is not None for d in docs) / len(docs) * 100
+    print(f"описаний: {len(docs)} ({mb:.1f} МБ), быстрый путь: {fast_share:.1f}%")
+
+    t_bs, ref = timed(lambda ds: [bs_text(d) for d in ds], docs, args.repeat)
+    t_fast, out = timed(lambda ds: [html_to_text(d) for d in ds], docs, args.repeat)
+    mismatches = sum(a != b for a, b in zip(ref, out))
+    print(f"совпадений с BeautifulSoup: {len(docs) - mismatches}/{len(docs)}")
+    if mismatches:
+        raise SystemExit("html_to_text расходится с BeautifulSoup")
+
+    per_doc = lambda t: t / len(docs) * 1e6
+    print(f"BeautifulSoup:     {t_bs:.3f} с  ({per_doc(t_bs):.0f} мкс/описание)")
+    print(f"html_to_text:      {t_fast:.3f} с  ({per_doc(t_fast):.0f} мкс/описание), x{t_bs / t_fast:.1f}")
+    if args.workers:
+        t_pool, pooled = timed(lambda ds: html_to_text_many(ds, args.workers), docs, args.repeat)
+        assert pooled == ref
+        print(f"пул x{args.workers}:         {t_pool:.3f} с  ({per_doc(t_pool):.0f} мкс/описание), x{t_bs / t_pool:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Бенчмарк: GenderMatcher (один проход) против GENDER_REGEXPS по очереди.
+
+    python3 bench_gender.py                                   # колонки vacancy + requirement из hh_kz_preprocessed.csv
+    python3 bench_gender.py --input hh_kz_sorted.csv
+    python3 bench_gender.py --long                            # плюс длинные тексты: описания из hh_almaty_2000_FINAL_FULL_LOCAL.csv
+
+Сначала проверяет, что метки совпадают на всех строках и что сработавшее
+правило действительно первое по порядку, затем печатает время и сколько раз
+сработало каждое правило.
+"""
+import argparse
+import csv
+import time
+from collections import Counter
+
+from sorting_data_by_field import GENDER_REGEXPS, GENDER_RULES, detect_gender_regexps, gender_text, match_gender
+
+SOURCE_CSV = "hh_kz_preprocessed.csv"
+LONG_CSV = "hh_almaty_2000_FINAL_FULL_LOCAL.csv"
+
+
+def load_pairs(path):
+    csv.field_size_limit(1 << 30)
+    with open(path, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        name_column = "vacancy" if "vacancy" in reader.fieldnames else "name"
+        return [(r[name_column] or None, r["requirement"] or None) for r in reader]
+
+
+def load_long(path):
+    csv.field_size_limit(1 << 30)
+    with open(path, encoding="utf-8") as f:
+        return [(r["name"] or None, r["description"]) for r in csv.DictReader(f) if r.get("description")]
+
+
+def timed(fn, pairs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = [fn(name, requirement) for name, requirement in pairs]
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def check(pairs, labels, matches):
+    for (name, requirement), label, (got, rule) in zip(pairs, labels, matches):
+        if label != got:
+            raise SystemExit(f"метки расходятся: {name!r} / {requirement!r}: {label} != {got}")
+        if rule is not None:
+            text = gender_text(name, requirement)
+            fired = [i for i, (regexp, _) in enumerate(GENDER_REGEXPS) if regexp.search(text)]
+            if fired[0] != rule:
+                raise SystemExit(f"правило {rule} вместо {fired[0]}: {text!r}")
+
+
+def report(title, pairs, repeat):
+    t_ref, labels = timed(detect_gender_regexps, pairs, repeat)
+    t_new, matches = timed(match_gender, pairs, repeat)
+    check(pairs, labels, matches)
+    chars = sum(len(gender_text(n, r)) for n, r in pairs)
+    print(f"{title}: строк {len(pairs)}, символов {chars}, метки совпали")
+    print(f"  GENDER_REGEXPS по очереди: {t_ref:.3f} с")
+    print(f"  GenderMatcher:             {t_new:.3f} с  x{t_ref / t_new:.1f}")
+    fired = Counter(rule for _, rule in matches)
+    for i, (label, trigger, target) in enumerate(GENDER_RULES):
+        if fired[i]:
+            print(f"  правило {i} ({label}, {target}{'' if trigger is None else ' после триггера'}): {fired[i]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=SOURCE_CSV, help="CSV с колонками vacancy/name и requirement")
+    parser.add_argument("--long", action="store_true", help=f"ещё и описания из {LONG_CSV}")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report(args.input, load_pairs(args.input), args.repeat)
+    if args.long:
+        report(LONG_CSV, load_long(LONG_CSV), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
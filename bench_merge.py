@@ -0,0 +1,105 @@
+"""
+Бенчмарк: merge_csv.merge_streaming против merge_csv.merge_parallel на синтетических дампах.
+
+    python3 bench_merge.py                        # 6 файлов по 20 000 строк, пул 1, 2, 4… до числа ядер
+    python3 bench_merge.py --files 12 --rows 50000 --workers 1,2,8
+    python3 bench_merge.py --keep dumps           # оставить сгенерированные hh_kz_*.csv в каталоге
+
+Дампы похожи на выгрузки сборщиков: вложенные поля как JSON, часть id
+повторяется между файлами, в описаниях встречаются кавычки и переводы строк.
+Сначала проверяет, что параллельный результат совпадает с последовательным
+байт в байт, затем печатает время и ускорение для каждого числа процессов.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from merge_csv import merge_parallel, merge_streaming, source_files
+
+AREAS = ["Алматы", "Астана", "Шымкент", "Караганда", "Актобе"]
+NAMES = ["Водитель", "Бухгалтер", "Менеджер по продажам", "Продавец-консультант", "Data Analyst"]
+REQUIREMENTS = [
+    "Опыт работы от 1 года.",
+    "Высшее образование, знание 1С и Excel.",
+    'Ответственность, "умение работать в команде".',
+    "Без опыта.\nОбучение на месте.",
+]
+
+
+def vacancy(vid: int, rnd: random.Random, extra: bool) -> dict:
+    row = {
+        "id": str(vid),
+        "name": rnd.choice(NAMES),
+        "area": json.dumps({"id": "160", "name": rnd.choice(AREAS)}, ensure_ascii=False),
+        "employer": json.dumps({"id": str(rnd.randint(1, 5000)), "name": f"ТОО {rnd.randint(1, 900)}"}, ensure_ascii=False),
+        "salary": json.dumps({"from": rnd.choice([None, 150000, 300000]), "currency": "KZT"}),
+        "snippet": json.dumps({"requirement": rnd.choice(REQUIREMENTS)}, ensure_ascii=False),
+        "published_at": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00+0500",
+        "alternate_url": f"https://hh.kz/vacancy/{vid}",
+    }
+    if extra:
+        row["night_shifts"] = str(rnd.random() < 0.1)
+    return row
+
+
+def write_dumps(workdir: Path, files: int, rows: int, overlap: float) -> None:
+    rnd = random.Random(42)
+    step = int(rows * (1 - overlap))
+    for n in range(files):
+        first = 100_000_000 + n * step
+        batch = [vacancy(first + i, rnd, extra=n % 2 == 1) for i in range(rows)]
+        with open(workdir / f"hh_kz_{n:02d}.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=sorted(batch[0]))
+            writer.writeheader()
+            writer.writerows(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=20_000, help="строк в каждом файле")
+    parser.add_argument("--overlap", type=float, default=0.3, help="доля id, повторяющихся в соседнем файле")
+    parser.add_argument("--workers", help="список чисел процессов через запятую")
+    parser.add_argument("--keep", help="каталог для дампов вместо временного")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cores:
+            counts.append(counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.keep or tmp)
+        workdir.mkdir(exist_ok=True)
+        write_dumps(workdir, args.files, args.rows, args.overlap)
+        merged = workdir / "hh_kz_combined.csv"
+        parallel_out = Path(tmp) / "parallel.csv"
+        csv_files = source_files(workdir, merged)
+        mb = sum(f.stat().st_size for f in csv_files) / 1e6
+        print(f"файлов: {len(csv_files)} ({mb:.1f} МБ), ядер: {cores}")
+
+        t = time.perf_counter()
+        merge_streaming(csv_files, merged)
+        t_seq = time.perf_counter() - t
+        reference = merged.read_bytes()
+        print(f"последовательно:   {t_seq:.2f} с")
+
+        for workers in counts:
+            t = time.perf_counter()
+            merge_parallel(csv_files, parallel_out, workers)
+            t_par = time.perf_counter() - t
+            if parallel_out.read_bytes() != reference:
+                raise SystemExit(f"merge_parallel({workers}) расходится с merge_streaming")
+            print(f"процессов: {workers:<3}     {t_par:.2f} с  x{t_seq / t_par:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Бенчмарк: режимы modeling_pipeline.py (dense, sparse, hgb) — время обучения и память.
+
+    python3 bench_modeling.py                               # 20 000 строк, каждый город дробится на 20
+    python3 bench_modeling.py --rows 100000 --settlements 50 --modes sparse,hgb
+    python3 bench_modeling.py --input hh_kz_preprocessed.parquet
+
+Строки берутся из hh_kz_preprocessed.csv с возвращением, а каждый город
+дробится на --settlements населённых пунктов (частоты — по закону Ципфа),
+чтобы one-hot матрица была такой же широкой, как на данных по всей стране.
+Каждый режим обучается в отдельном процессе, пиковая память — ru_maxrss
+этого процесса (os.wait4). Кроме времени обучения каждой модели печатает
+размер матрицы признаков после препроцессора.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from hh_columnar import read_table, write_table
+from modeling_pipeline import INPUT_COLUMNS, INPUT_FILE, MODES, load_features, train
+
+RESULT_PREFIX = "BENCH "
+
+
+def synthetic(path: str, rows: int, settlements: int, seed: int = 42) -> pd.DataFrame:
+    df = read_table(path, INPUT_COLUMNS)
+    rnd = np.random.default_rng(seed)
+    df = df.sample(rows, replace=True, random_state=seed).reset_index(drop=True)
+    weights = 1 / np.arange(1, settlements + 1)
+    settlement = rnd.choice(settlements, size=rows, p=weights / weights.sum())
+    df["city"] = df["city"].astype(object).fillna("Unknown") + " / " + pd.Series(settlement).astype(str)
+    return df
+
+
+def matrix_mb(matrix) -> float:
+    if hasattr(matrix, "indptr"):  # scipy.sparse
+        return (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 2**20
+    return matrix.nbytes / 2**20
+
+
+def child(mode: str, data: str) -> None:
+    X, y = load_features(data)
+    results = train(X, y, mode)
+    X_train = X.iloc[: int(len(X) * 0.8)]
+    for result in results:
+        design = result["pipeline"].named_steps["preprocessor"].transform(X_train)
+        print(RESULT_PREFIX + json.dumps({
+            "model": result["name"],
+            "fit_seconds": result["fit_seconds"],
+            "r2": result["r2"],
+            "shape": list(design.shape),
+            "matrix_mb": matrix_mb(design),
+        }))
+
+
+def run_mode(mode: str, data: str):
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--child", mode, "--data", data], stdout=subprocess.PIPE, text=True
+    )
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise SystemExit(f"режим {mode} завершился с кодом {process.returncode}")
+    results = [json.loads(line[len(RESULT_PREFIX):]) for line in output.splitlines() if line.startswith(RESULT_PREFIX)]
+    return results, usage.ru_maxrss / 1024  # в Linux ru_maxrss — в КБ
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--settlements", type=int, default=20, help="на сколько населённых пунктов дробится каждый город")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.data)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = str(Path(tmp) / "bench.parquet")
+        df = synthetic(args.input, args.rows, args.settlements)
+        write_table(df, data)
+        print(f"строк: {len(df)}, городов: {df['city'].nunique()}")
+        print(f"{'режим':<8}{'модель':<22}{'обучение, с':>12}{'R²':>8}{'матрица':>18}{'МБ':>9}{'пик, МБ':>10}")
+        for mode in args.modes.split(","):
+            results, peak_mb = run_mode(mode, data)
+            for result in results:
+                shape = "×".join(map(str, result["shape"]))
+                print(
+                    f"{mode:<8}{result['model']:<22}{result['fit_seconds']:>12.2f}{result['r2']:>8.3f}"
+                    f"{shape:>18}{result['matrix_mb']:>9.1f}{peak_mb:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
+import argparse
+
+import numpy as np
 import pandas as pd
 
+from hh_columnar import columnar_name, read_table, write_table
+from hh_factor import map_unique
+from hh_fx import FX_FILE, load_rates, rates_on_dates
+
 INPUT_FILE = "hh_kz_sorted.csv"
 OUTPUT_FILE = "hh_kz_preprocessed.csv"
 
-# Курсы валют по состоянию на момент сбора (в KZT за единицу валюты)
+# Курсы валют по состоянию на момент сбора (в KZT за единицу валюты);
+# если есть таблица курсов по датам (hh_fx, fx_rates.csv), они нужны только для валют не из неё
 CURRENCY_RATES = {
     "KZT": 1.0,
     "USD": 510.0,
@@ -24,35 +32,43 @@ PERIOD_MULTIPLIERS = {
 MONTHLY_TO_HOURLY = 160.0
 
 
-def convert_amount(amount: float, currency: str, period: str) -> float | None:
+def factor_array(keys: pd.Series, factors: dict) -> np.ndarray:
+    """
+    Множитель из словаря factors для каждой строки: словарь просматривается один раз
+    на каждое различное значение, а по строкам множители раскладываются через коды
+    factorize. Неизвестное значение и пропуск дают NaN.
+    """
+    return map_unique(keys, lambda uniques: [factors.get(key, np.nan) for key in uniques], np.nan, "float64")
+
+
+def convert_amounts(amounts: pd.Series, currencies: pd.Series, periods: pd.Series, rates=None) -> np.ndarray:
     """
-    Переводит число из заданной валюты и периода в KZT/месяц.
-    Народные значения периодов, не представленные в словаре, игнорируются.
+    Переводит суммы в KZT/месяц: сумма * курс * множитель периода, операциями NumPy
+    над целыми колонками. Нет суммы, неизвестная валюта или период — NaN. rates — курсы
+    по строкам (например, на дату публикации); по умолчанию — CURRENCY_RATES.
     """
-    if pd.isna(amount):
-        return None
-    rate = CURRENCY_RATES.get(currency)
-    multiplier = PERIOD_MULTIPLIERS.get(period)
-    if rate is None or multiplier is None:
-        return None
-    return float(amount) * rate * multiplier
-
-
-def preprocess() -> None:
-    # Загрузка и первичная подготовка
-    df = pd.read_csv(INPUT_FILE, dtype=str)
+    if rates is None:
+        rates = factor_array(currencies, CURRENCY_RATES)
+    multipliers = factor_array(periods, PERIOD_MULTIPLIERS)
+    return amounts.to_numpy(dtype="float64", na_value=np.nan) * rates * multipliers
+
+
+def preprocess(input_file: str = INPUT_FILE, output_file: str = OUTPUT_FILE, fx_file: str = FX_FILE) -> None:
+    # Загрузка и первичная подготовка (из .parquet — уже с типами, см. hh_columnar)
+    df = read_table(input_file, dtype=str)
     df["salary_from"] = pd.to_numeric(df["salary_from"], errors="coerce")
     df["salary_to"] = pd.to_numeric(df["salary_to"], errors="coerce")
 
+    # Курс на дату публикации, если есть таблица курсов, иначе снимок CURRENCY_RATES
+    rates = factor_array(df["currency"], CURRENCY_RATES)
+    fx_table = load_rates(fx_file)
+    if fx_table is not None:
+        rates = rates_on_dates(fx_table, df["currency"], df["published_at"], rates)
+        print("Курсы валют на дату публикации из", fx_file)
+
     # Конвертация зарплат в KZT/месяц
-    df["salary_from_kzt"] = df.apply(
-        lambda row: convert_amount(row["salary_from"], row["currency"], row["payment_by"]),
-        axis=1,
-    )
-    df["salary_to_kzt"] = df.apply(
-        lambda row: convert_amount(row["salary_to"], row["currency"], row["payment_by"]),
-        axis=1,
-    )
+    df["salary_from_kzt"] = convert_amounts(df["salary_from"], df["currency"], df["payment_by"], rates)
+    df["salary_to_kzt"] = convert_amounts(df["salary_to"], df["currency"], df["payment_by"], rates)
 
     # Удаляем строки, где ни одно значение не конвертировалось
     df = df[df["salary_from_kzt"].notna() | df["salary_to_kzt"].notna()].copy()
@@ -71,10 +87,22 @@ def preprocess() -> None:
     df = df[df["salary_avg_kzt"] > 0]
 
     # Сохраняем результат до этапа EDA
-    df.to_csv(OUTPUT_FILE, index=False)
-    print("Предобработанный набор данных сохранён в", OUTPUT_FILE)
+    write_table(df, output_file)
+    print("Предобработанный набор данных сохранён в", output_file)
     print("Размер набора:", df.shape)
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нормализация зарплат hh_kz_sorted.csv → hh_kz_preprocessed.csv")
+    parser.add_argument("--parquet", action="store_true", help="читать и писать .parquet вместо .csv (см. hh_columnar)")
+    parser.add_argument("--fx", default=FX_FILE, help="таблица курсов по датам: date,currency,rate (см. hh_fx)")
+    args = parser.parse_args()
+
+    if args.parquet:
+        preprocess(columnar_name(INPUT_FILE), columnar_name(OUTPUT_FILE), args.fx)
+    else:
+        preprocess(fx_file=args.fx)
+
+
 if __name__ == "__main__":
-    preprocess()
+    main()
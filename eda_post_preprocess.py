@@ -1,3 +1,4 @@
+import argparse
 import os
 from pathlib import Path
 
@@ -7,8 +8,14 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
+from hh_columnar import columnar_name
+from hh_schema import COMPACT_FLOAT, FLOATS, load_preprocessed, memory_mb
+
 INPUT_FILE = "hh_kz_preprocessed.csv"
 PLOT_DIR = Path("eda_plots")
+GROUP_COLUMNS = ["city", "experience", "employment"]
+# колонки, которые нужны графикам: группы, зарплаты и числовые id для матрицы корреляций
+EDA_COLUMNS = ["id", "employer_id"] + GROUP_COLUMNS + FLOATS
 
 SECTION_SEPARATOR = "\n" + "-" * 60 + "\n"
 
@@ -28,6 +35,7 @@ def log_section(title: str) -> None:
 def dataset_overview(df: pd.DataFrame) -> None:
     log_section("Данные / Информация")
     print("Shape:", df.shape)
+    print(f"Memory: {memory_mb(df).sum():.2f} MB")
     print("\nColumns and dtypes:")
     print(df.dtypes)
     print("\nSummary statistics:")
@@ -89,9 +97,14 @@ def correlation_visualization(df: pd.DataFrame) -> None:
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="EDA по hh_kz_preprocessed.csv")
+    parser.add_argument("--parquet", action="store_true", help="читать hh_kz_preprocessed.parquet (см. hh_columnar)")
+    args = parser.parse_args()
+
     cleanup_old_plots()
     sns.set_theme(style="whitegrid")
-    df = pd.read_csv(INPUT_FILE)
+    # тексты (url, requirement, vacancy) графикам не нужны и не читаются; зарплаты в float32 только здесь
+    df = load_preprocessed(columnar_name(INPUT_FILE) if args.parquet else INPUT_FILE, EDA_COLUMNS, COMPACT_FLOAT)
     dataset_overview(df)
     salary_distribution(df)
     grouped_salary(
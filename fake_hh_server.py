@@ -0,0 +1,176 @@
+"""
+Локальный фейковый hh.ru для прогона сборщиков без сети.
+
+    python3 fake_hh_server.py --vacancies 5000 --port 8765
+    HH_BASE_URL=http://127.0.0.1:8765/vacancies python3 1.py --async --db /tmp/hh.db --csv /tmp/hh.csv
+
+Отдаёт /vacancies (фильтр по date_from/date_to, лимит глубины 2000 как у hh.ru)
+и /vacancies/{id}. С --max-rps отвечает 429 с Retry-After при превышении бюджета.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_DEPTH = 2000
+
+CURRENCIES = ["KZT", "KZT", "KZT", "USD", "RUR"]
+SCHEDULES = [("fullDay", "Полный день"), ("shift", "Сменный график"), ("remote", "Удаленная работа")]
+EXPERIENCES = [("noExperience", "Нет опыта"), ("between1And3", "От 1 года до 3 лет"), ("between3And6", "От 3 до 6 лет")]
+
+
+def parse_dt(value):
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def make_vacancies(n: int, days: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    out = []
+    for i in range(n):
+        published = now - timedelta(seconds=rnd.uniform(0, days * 86400))
+        schedule = rnd.choice(SCHEDULES)
+        experience = rnd.choice(EXPERIENCES)
+        salary_from = rnd.choice([None, 150_000, 250_000, 400_000])
+        out.append({
+            "id": str(100_000_000 + i),
+            "name": f"Вакансия {i}",
+            "area": {"id": "160", "name": "Алматы"},
+            "salary": {"from": salary_from, "to": None, "currency": rnd.choice(CURRENCIES), "gross": False},
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "employer": {"id": str(rnd.randint(1, 500)), "name": f"Компания {rnd.randint(1, 500)}"},
+            "schedule": {"id": schedule[0], "name": schedule[1]},
+            "experience": {"id": experience[0], "name": experience[1]},
+            "employment": {"id": "full", "name": "Полная занятость"},
+            "snippet": {"requirement": "Опыт работы от 1 года.", "responsibility": None},
+            "alternate_url": f"https://hh.ru/vacancy/{100_000_000 + i}",
+            "_published_dt": published,
+        })
+    out.sort(key=lambda v: v["_published_dt"], reverse=True)
+    return out
+
+
+class FakeHH:
+    def __init__(self, vacancies, max_rps=None):
+        self.vacancies = vacancies
+        self.by_id = {v["id"]: v for v in vacancies}
+        self.max_rps = max_rps
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.requests = 0
+        self.throttled = 0
+
+    def allow(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            if not self.max_rps:
+                return True
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            if self.window_count > self.max_rps:
+                self.throttled += 1
+                return False
+            return True
+
+    def search(self, query: dict) -> dict:
+        date_from = parse_dt(query.get("date_from"))
+        date_to = parse_dt(query.get("date_to"))
+        per_page = int(query.get("per_page", 20))
+        page = int(query.get("page", 0))
+
+        found = [
+            v for v in self.vacancies
+            if (date_from is None or v["_published_dt"] >= date_from)
+            and (date_to is None or v["_published_dt"] < date_to)
+        ]
+        reachable = found[:MAX_DEPTH]
+        pages = (len(reachable) + per_page - 1) // per_page
+        items = reachable[page * per_page:(page + 1) * per_page]
+        return {
+            "found": len(found),
+            "pages": pages,
+            "page": page,
+            "per_page": per_page,
+            "items": [public(v) for v in items],
+        }
+
+    def details(self, vid: str):
+        v = self.by_id.get(vid)
+        if v is None:
+            return None
+        d = public(v)
+        d["description"] = "<p><strong>Обязанности:</strong></p><ul><li>" + "Работа с клиентами. " * 12 + "</li></ul>"
+        d["key_skills"] = [{"name": "Excel"}, {"name": "SQL"}]
+        d["address"] = {"raw": "Алматы, проспект Абая, 1"}
+        return d
+
+
+def public(v: dict) -> dict:
+    return {k: val for k, val in v.items() if not k.startswith("_")}
+
+
+def make_handler(fake: FakeHH):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if not fake.allow():
+                self.send_json(429, {"errors": [{"type": "too_many_requests"}]}, {"Retry-After": "1"})
+                return
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            parts = [p for p in url.path.split("/") if p]
+            if parts == ["vacancies"]:
+                self.send_json(200, fake.search(query))
+            elif len(parts) == 2 and parts[0] == "vacancies":
+                d = fake.details(parts[1])
+                self.send_json(200 if d else 404, d or {"errors": [{"type": "not_found"}]})
+            else:
+                self.send_json(404, {"errors": [{"type": "not_found"}]})
+
+    return Handler
+
+
+def serve(port=8765, vacancies=5000, days=30, max_rps=None, seed=0):
+    fake = FakeHH(make_vacancies(vacancies, days, seed), max_rps)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fake))
+    server.fake = fake
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Фейковый hh.ru API для локальных прогонов")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--vacancies", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--max-rps", type=float, default=None)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.vacancies, args.days, args.max_rps)
+    print(f"▶ fake hh.ru: http://127.0.0.1:{args.port}/vacancies | вакансий: {args.vacancies}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⛔ Стоп | запросов: {server.fake.requests}, 429: {server.fake.throttled}")
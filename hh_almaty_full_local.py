@@ -1,13 +1,23 @@
 import requests
-import pandas as pd
-import time
 import itertools
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from bs4 import BeautifulSoup
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 
+from hh_html import html_to_text
+from hh_ids import IdIndex
+from hh_sink import CsvSink
+from hh_throttle import Throttle, throttled_get
+
 # ================== CONFIG ==================
-BASE_URL = "https://api.hh.ru/vacancies"
+BASE_URL = os.environ.get("HH_BASE_URL", "https://api.hh.ru/vacancies")
 PER_PAGE = 100
 TIMEOUT = 10
 HEADERS = {"User-Agent": "hh-balanced-local"}
@@ -26,10 +36,19 @@ COUNTRY_NAMES = {
 QUALITY_MIN_DESC = 150
 MAX_ATTEMPTS = 100
 CHECKPOINT_FILE = "hh_kz_checkpoint.csv"
+JOURNAL_FILE = "hh_kz_crawl_journal.jsonl"
+FINAL_FILE = "hh_kz_FINAL.csv"
+RPS = 3.0
+DETAIL_WORKERS = 3          # потоков на /vacancies/{id}
+MAX_PENDING_PER_WORKER = 4  # сколько деталей держим в очереди на поток, прежде чем притормозить поиск
+PROGRESS_EVERY = 5.0        # сек между строками прогресса
+
+# один троттлинг на поиск и детальные запросы из всех потоков
+THROTTLE = Throttle(rate=RPS)
 
 # ================== DATE WINDOWS ==================
-def generate_date_windows():
-    today = datetime.today()
+def generate_date_windows(today=None):
+    today = today or datetime.today()
     windows = [
         (today - timedelta(days=7), today),
         (today - timedelta(days=14), today - timedelta(days=7)),
@@ -39,14 +58,29 @@ def generate_date_windows():
     ]
     return [(a.strftime("%Y-%m-%d"), b.strftime("%Y-%m-%d")) for a, b in windows]
 
+# ================== HTTP ==================
+def make_session(workers):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers + 1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# keep-alive соединения на весь прогон; пересоздаётся в main() под --workers
+SESSION = make_session(DETAIL_WORKERS)
+# пул процессов для clean_html (--html-workers); None — разбор прямо в потоке деталей
+HTML_POOL = None
+
 # ================== HELPERS ==================
 def clean_html(html):
     if not html:
         return None
-    text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+    text = html_to_text(html)
     return text if len(text) >= QUALITY_MIN_DESC else None
 
 def fetch_page(area_id, text, page, date_from, date_to):
+    """Вакансии страницы; [] — страница пустая, None — запрос не удался (повторим позже)."""
     params = {
         "area": area_id,
         "text": text,
@@ -56,19 +90,23 @@ def fetch_page(area_id, text, page, date_from, date_to):
         "per_page": PER_PAGE,
         "order_by": "publication_time",
     }
-    r = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=TIMEOUT)
-    if r.status_code != 200:
-        return []
-    return r.json().get("items", [])
+    try:
+        r = throttled_get(THROTTLE, BASE_URL, session=SESSION, params=params, timeout=TIMEOUT)
+        if r.status_code != 200:
+            return None
+        return r.json().get("items", [])
+    except (requests.RequestException, ValueError):
+        return None
 
 def fetch_details_safe(vac_id):
     try:
-        r = requests.get(f"{BASE_URL}/{vac_id}", headers=HEADERS, timeout=TIMEOUT)
+        r = throttled_get(THROTTLE, f"{BASE_URL}/{vac_id}", session=SESSION, timeout=TIMEOUT)
         if r.status_code != 200:
             return None
 
         v = r.json()
-        desc = clean_html(v.get("description"))
+        html = v.get("description")
+        desc = HTML_POOL.submit(clean_html, html).result() if HTML_POOL else clean_html(html)
         if not desc:
             return None
 
@@ -81,17 +119,153 @@ def fetch_details_safe(vac_id):
         return None
 
 # ================== CHECKPOINT ==================
-def save_checkpoint(rows):
-    if not rows:
-        return
-    pd.DataFrame(rows).to_csv(CHECKPOINT_FILE, index=False)
-    print(f"💾 Checkpoint saved: {len(rows)} rows")
+CHECKPOINT_COLUMNS = [
+    "id", "name", "company", "published_at", "url", "salary_from", "salary_to", "salary_currency",
+    "experience", "employment", "schedule", "city", "description", "key_skills", "address",
+    "country", "country_name",
+]
+
+
+class CrawlJournal:
+    """
+    Журнал обхода (JSON Lines, только дозапись): завершённые единицы
+    (попытка, text, окно, page) и сколько строк по каждой стране уже лежит в чекпоинте.
+    После перезапуска завершённые единицы пропускаются.
+
+    Окна дат считаются от даты первого запуска (anchor), а не от сегодняшней:
+    иначе продолжение на следующий день не узнало бы ни одной единицы.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.done = set()
+        self.rows = Counter()
+        self.anchor = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # недописанная строка после падения
+                    if rec["type"] == "unit":
+                        self.done.add(tuple(rec["unit"]))
+                    elif rec["type"] == "rows":
+                        self.rows[rec["country"]] += rec["n"]
+                    elif rec["type"] == "anchor":
+                        self.anchor = datetime.fromisoformat(rec["date"])
+        self.f = open(path, "a", encoding="utf-8")
+        if self.anchor is None:
+            self.anchor = datetime.today()
+            self._write({"type": "anchor", "date": self.anchor.isoformat()})
+
+    def is_done(self, unit) -> bool:
+        return tuple(unit) in self.done
+
+    def mark_done(self, unit):
+        self.done.add(tuple(unit))
+        self._write({"type": "unit", "unit": list(unit)})
+
+    def add_rows(self, country, n):
+        self.rows[country] += n
+        self._write({"type": "rows", "country": country, "n": n})
+
+    def close(self):
+        self.f.close()
+
+    def _write(self, rec):
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+
+def reset_crawl_state():
+    for path in (JOURNAL_FILE, CHECKPOINT_FILE, f"{CHECKPOINT_FILE}.schema.json", f"{CHECKPOINT_FILE}.idx"):
+        if os.path.exists(path):
+            os.remove(path)
 
 # ================== BATCH COLLECTOR ==================
-def collect_batch_for_country(area_id, seen_ids):
-    rows = []
+def build_row(item, details):
+    salary = item.get("salary") or {}
+    employer = item.get("employer") or {}
+    return {
+        "id": item["id"],
+        "name": item.get("name"),
+        "company": employer.get("name"),
+        "published_at": item.get("published_at"),
+        "url": item.get("alternate_url"),
+        "salary_from": salary.get("from"),
+        "salary_to": salary.get("to"),
+        "salary_currency": salary.get("currency"),
+        "experience": (item.get("experience") or {}).get("name"),
+        "employment": (item.get("employment") or {}).get("name"),
+        "schedule": (item.get("schedule") or {}).get("name"),
+        "city": item.get("area", {}).get("name"),
+        **details,
+    }
+
+
+class Progress:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.last = self.started
+        self.pages = 0
+        self.details = 0
+        self.raw = 0  # строки с деталями до фильтра качества
+        self.rows = 0
+
+    def tick(self, pending, force=False):
+        now = time.monotonic()
+        if not force and now - self.last < PROGRESS_EVERY:
+            return
+        self.last = now
+        elapsed = max(now - self.started, 1e-9)
+        print(
+            f"         📈 pages={self.pages} details={self.details} rows={self.rows} "
+            f"в очереди={pending} | {self.details / elapsed:.1f} det/s, {self.rows / elapsed:.1f} rows/s"
+        )
+
+
+def collect_batch_for_country(area_id, seen_ids, pool, save_rows, journal, attempt=1,
+                              workers=DETAIL_WORKERS, progress=None, saved=()):
+    """
+    Поиск (производитель) и детали (потребители пула) идут внахлёст: страница
+    сразу раздаёт id в общий пул и не ждёт их, пока очередь не упрётся в лимит.
+
+    Готовые строки сразу уходят в save_rows (он возвращает True, когда цель набрана),
+    а страница отмечается в журнале, только когда все её строки сохранены.
+    """
+    progress = progress or Progress()
+    pending = {}
+    unit_left = {}
+    max_pending = workers * MAX_PENDING_PER_WORKER
     text_cycle = itertools.cycle(SEARCH_TEXTS)
-    date_windows = generate_date_windows()
+    date_windows = generate_date_windows(journal.anchor)
+    enough = False
+    batch_rows = 0
+
+    def harvest(done):
+        nonlocal enough, batch_rows
+        rows = []
+        finished = []
+        for fut in done:
+            item, unit = pending.pop(fut)
+            progress.details += 1
+            details = fut.result()
+            if details:
+                rows.append(build_row(item, details))
+            unit_left[unit] -= 1
+            if unit_left[unit] == 0:
+                finished.append(unit)
+        progress.raw += len(rows)
+        if rows:
+            added, enough = save_rows(rows)
+            progress.rows += added
+            batch_rows += added
+        for unit in finished:
+            del unit_left[unit]
+            # после набора цели строки отбрасываются — такие страницы не считаем пройденными
+            if not enough:
+                journal.mark_done(unit)
 
     for date_from, date_to in date_windows:
         for _ in range(len(SEARCH_TEXTS)):
@@ -99,99 +273,127 @@ def collect_batch_for_country(area_id, seen_ids):
             print(f"      🔎 text='{text}' | {date_from} → {date_to}")
 
             for page in range(3):
+                if enough:
+                    break
+                unit = (attempt, text, date_from, date_to, page)
+                if journal.is_done(unit):
+                    continue
+
                 items = fetch_page(area_id, text, page, date_from, date_to)
+                if items is None:
+                    break  # сбой запроса: единица остаётся незавершённой и повторится при перезапуске
                 if not items:
+                    journal.mark_done(unit)
                     break
 
+                progress.pages += 1
                 print(f"         📄 page {page}, items={len(items)}")
 
-                with ThreadPoolExecutor(max_workers=3) as executor:
-                    futures = {}
-                    for item in items:
-                        vid = item["id"]
-                        if vid in seen_ids:
-                            continue
-                        seen_ids.add(vid)
-                        futures[executor.submit(fetch_details_safe, vid)] = item
-
-                    for fut in as_completed(futures):
-                        details = fut.result()
-                        if not details:
-                            continue
-
-                        salary = item.get("salary") or {}
-                        employer = item.get("employer") or {}
-
-                        rows.append({
-                            "id": item["id"],
-                            "name": item.get("name"),
-                            "company": employer.get("name"),
-                            "published_at": item.get("published_at"),
-                            "url": item.get("alternate_url"),
-                            "salary_from": salary.get("from"),
-                            "salary_to": salary.get("to"),
-                            "salary_currency": salary.get("currency"),
-                            "experience": (item.get("experience") or {}).get("name"),
-                            "employment": (item.get("employment") or {}).get("name"),
-                            "schedule": (item.get("schedule") or {}).get("name"),
-                            "city": item.get("area", {}).get("name"),
-                            **details,
-                        })
-
-                time.sleep(0.3)
-
-    print(f"      ✅ batch rows collected: {len(rows)}")
-    return pd.DataFrame(rows)
+                # +1 держит единицу открытой, пока раздаём её id
+                unit_left[unit] = 1
+                for item in items:
+                    vid = item["id"]
+                    if vid in saved or not seen_ids.add(vid):
+                        continue
+                    while len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        harvest(done)
+                    unit_left[unit] += 1
+                    pending[pool.submit(fetch_details_safe, vid)] = (item, unit)
+
+                unit_left[unit] -= 1
+                if unit_left[unit] == 0:
+                    del unit_left[unit]
+                    journal.mark_done(unit)
+
+                harvest([f for f in list(pending) if f.done()])
+                progress.tick(len(pending))
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        harvest(done)
+    progress.tick(0, force=True)
+
+    print(f"      ✅ batch rows collected: {batch_rows}")
+    return batch_rows
 
 # ================== QUALITY FILTER ==================
 def is_quality(row):
     return isinstance(row["description"], str) and len(row["description"]) >= QUALITY_MIN_DESC
 
 # ================== MAIN ==================
-final_rows = []
-total_seen = 0
-
-try:
-    for country, cfg in COUNTRIES.items():
-        print(f"\n🌍 Collecting {country}")
-
-        collected = 0
-        attempts = 0
-        seen_ids = set()
-
-        while collected < cfg["target"] and attempts < MAX_ATTEMPTS:
-            attempts += 1
-            batch_df = collect_batch_for_country(cfg["area"], seen_ids)
-
-            total_seen += len(batch_df)
-            print(f"   🔍 seen raw: {total_seen}, quality: {collected}")
-            print(f"   📦 Batch fetched: {len(batch_df)} rows")
-
-            if batch_df.empty:
-                continue
-
-            added = 0
-            for _, row in batch_df.iterrows():
-                if is_quality(row):
-                    row["country"] = country
-                    row["country_name"] = COUNTRY_NAMES[country]
-                    final_rows.append(row)
-                    collected += 1
-                    added += 1
-                if collected >= cfg["target"]:
-                    break
-
-            print(f"   ➕ +{added}, всего: {collected}")
-            save_checkpoint(final_rows)
-
-        print(f"✅ {country}: {collected} (attempts={attempts})")
-
-except KeyboardInterrupt:
-    print("\n⛔ Остановка пользователем")
-    save_checkpoint(final_rows)
-    print("💾 Данные сохранены, можно идти в анализ")
-
-# ================== FINAL SAVE ==================
-final_df = pd.DataFrame(final_rows)
-final_df.to_csv("hh_kz_FINAL.csv", index=False)
-print("\n🎉 DONE: hh_kz_FINAL.csv")
+def main(workers=DETAIL_WORKERS, fresh=False, html_workers=0):
+    global SESSION, HTML_POOL
+    SESSION = make_session(workers)
+    # spawn: пул живёт рядом с потоками деталей, fork из многопоточного процесса небезопасен
+    HTML_POOL = ProcessPoolExecutor(html_workers, mp_context=multiprocessing.get_context("spawn")) if html_workers else None
+
+    if fresh:
+        reset_crawl_state()
+    journal = CrawlJournal(JOURNAL_FILE)
+    checkpoint = CsvSink(CHECKPOINT_FILE, columns=CHECKPOINT_COLUMNS)
+    if journal.done:
+        print(f"♻️ Продолжаем: готово единиц {len(journal.done)}, строк в чекпоинте {len(checkpoint)}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        progress = Progress()
+        try:
+            for country, cfg in COUNTRIES.items():
+                print(f"\n🌍 Collecting {country}")
+
+                attempts = 0
+                # уже сохранённые id знает индекс чекпоинта; здесь — всё, что отправляли за этот прогон
+                seen_ids = IdIndex()
+
+                def save_rows(rows):
+                    quality = []
+                    for row in rows:
+                        if row["id"] in checkpoint or not is_quality(row):
+                            continue
+                        if journal.rows[country] + len(quality) >= cfg["target"]:
+                            break
+                        row["country"] = country
+                        row["country_name"] = COUNTRY_NAMES[country]
+                        quality.append(row)
+                    added = checkpoint.append(quality)
+                    if added:
+                        journal.add_rows(country, added)
+                    return added, journal.rows[country] >= cfg["target"]
+
+                while journal.rows[country] < cfg["target"] and attempts < MAX_ATTEMPTS:
+                    attempts += 1
+                    added = collect_batch_for_country(
+                        cfg["area"], seen_ids, pool, save_rows, journal, attempts, workers, progress, checkpoint
+                    )
+
+                    print(f"   🔍 seen raw: {progress.raw}, quality: {journal.rows[country]}")
+                    print(f"   ➕ +{added}, всего: {journal.rows[country]}")
+                    if added:
+                        print(f"💾 Checkpoint: {len(checkpoint)} rows")
+
+                print(f"✅ {country}: {journal.rows[country]} (attempts={attempts})")
+
+        except KeyboardInterrupt:
+            print("\n⛔ Остановка пользователем")
+            pool.shutdown(wait=False, cancel_futures=True)
+            print(f"💾 В чекпоинте {len(checkpoint)} строк; повторный запуск продолжит с места остановки")
+
+    if HTML_POOL:
+        HTML_POOL.shutdown()
+
+    # ================== FINAL SAVE ==================
+    print(THROTTLE.report())
+    journal.close()
+    checkpoint.close()
+    if os.path.exists(CHECKPOINT_FILE):
+        shutil.copyfile(CHECKPOINT_FILE, FINAL_FILE)
+    print(f"\n🎉 DONE: {FINAL_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сбор вакансий hh.ru с описаниями (поиск и детали внахлёст)")
+    parser.add_argument("--workers", type=int, default=DETAIL_WORKERS, help="потоков на детальные запросы")
+    parser.add_argument("--fresh", action="store_true", help="забыть журнал и чекпоинт и начать заново")
+    parser.add_argument("--html-workers", type=int, default=0, help="процессов на разбор HTML описаний (0 — в потоках)")
+    args = parser.parse_args()
+    main(args.workers, args.fresh, args.html_workers)
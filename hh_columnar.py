@@ -0,0 +1,156 @@
+"""
+Колоночный промежуточный формат (Parquet) между этапами конвейера.
+
+По умолчанию этапы передают друг другу CSV, и каждый следующий разбирает
+весь текст заново и заново выводит типы. С --parquet тот же файл пишется как
+hh_kz_*.parquet: типы выводятся один раз при записи (infer_types — так же,
+как их вывел бы read_csv), строковые колонки с повторами становятся
+категориями (в Parquet — словарное кодирование), а читатель берёт только
+нужные ему колонки (read_table(path, columns)).
+
+Формат выбирается по расширению файла, так что read_table/write_table
+одинаково работают и с CSV. Для Parquet нужен pyarrow.
+"""
+import csv
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from hh_factor import spread
+
+COLUMNAR_SUFFIX = ".parquet"
+CHUNKSIZE = 50_000  # строк в группе строк (row group) при переводе CSV → Parquet
+CATEGORY_RATIO = 0.5  # строковая колонка — категория, если различных значений не больше половины
+BOOL_STRINGS = {"true": True, "false": False}
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("❌ Для Parquet нужен pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def is_columnar(path) -> bool:
+    return Path(path).suffix == COLUMNAR_SUFFIX
+
+
+def columnar_name(path) -> str:
+    """hh_kz_sorted.csv → hh_kz_sorted.parquet."""
+    return str(Path(path).with_suffix(COLUMNAR_SUFFIX))
+
+
+def table_columns(path) -> List[str]:
+    if is_columnar(path):
+        _, pq = _parquet()
+        return pq.read_schema(path).names
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def _present(path, columns: Optional[Iterable[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    existing = set(table_columns(path))
+    return [column for column in columns if column in existing]
+
+
+def read_table(path, columns: Optional[Iterable[str]] = None, **csv_kw) -> pd.DataFrame:
+    """
+    Таблица из CSV или Parquet; columns — только эти колонки (отсутствующие в файле
+    пропускаются). csv_kw передаются read_csv, для Parquet они не нужны: типы уже в файле.
+    """
+    columns = _present(path, columns)
+    if is_columnar(path):
+        _parquet()
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, **csv_kw)
+
+
+def row_groups(path) -> int:
+    _, pq = _parquet()
+    return pq.ParquetFile(path).num_row_groups
+
+
+def read_row_group(path, index: int, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Одна группа строк Parquet — естественный кусок для пула процессов."""
+    _, pq = _parquet()
+    return pq.ParquetFile(path).read_row_group(index, columns=_present(path, columns)).to_pandas()
+
+
+def _text(value):
+    """Значение ячейки так, как его записал бы to_csv; пустая строка — пропуск."""
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    value = value if isinstance(value, str) else str(value)
+    return value or None
+
+
+def _infer_column(column: pd.Series) -> pd.Series:
+    try:
+        codes, uniques = pd.factorize(column)
+    except TypeError:  # словари и списки не хэшируются — сначала в текст, как у to_csv
+        codes, uniques = pd.factorize(column.map(_text))
+    texts = [_text(value) for value in uniques]
+    values = [text for text in texts if text is not None]
+
+    def expand(table):
+        return pd.Series(spread(codes, table), index=column.index)
+
+    if not values:
+        return pd.Series(np.nan, index=column.index, dtype="float64")
+    missing = (codes == -1).any() or len(values) < len(texts)
+    if all(text.lower() in BOOL_STRINGS for text in values):
+        flags = expand(None if text is None else BOOL_STRINGS[text.lower()] for text in texts)
+        return flags.astype("boolean") if missing else flags.astype(bool)
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    if numbers.notna().all():
+        return pd.to_numeric(expand(texts))
+    text = expand(texts)
+    if len(values) <= CATEGORY_RATIO * text.notna().sum():
+        return text.astype("category")
+    return text.astype("str")
+
+
+def infer_types(df: pd.DataFrame, keep: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Типы колонок, которые read_csv вывел бы при чтении того же CSV: True/False —
+    bool, числа — int/float, пустые — float NaN. Остальные строковые колонки —
+    категории, если значения повторяются, иначе строки. Решение принимается по
+    различным значениям, так что категории после фильтрации строк переопределяются
+    заново. Колонки keep и уже числовые колонки и даты не трогаются.
+    """
+    keep = set(keep)
+    out = {}
+    for name, column in df.items():
+        if name in keep or column.dtype.kind in "biufcmM":
+            out[name] = column
+        else:
+            out[name] = _infer_column(column)
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_table(df: pd.DataFrame, path, keep: Iterable[str] = ()) -> None:
+    """CSV как раньше или Parquet с типами infer_types (keep — колонки, тип которых уже задан)."""
+    if not is_columnar(path):
+        df.to_csv(path, index=False)
+        return
+    _parquet()
+    infer_types(df, keep).to_parquet(path, index=False)
+
+
+def csv_to_columnar(csv_path, parquet_path, chunksize: int = CHUNKSIZE) -> None:
+    """
+    Перевод CSV в Parquet кусками, все колонки — строки, пустые — "" (как читают
+    hh_kz_combined.csv этапы: dtype=str, keep_default_na=False). Кусок — группа строк.
+    """
+    pa, pq = _parquet()
+    columns = table_columns(csv_path)
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(parquet_path, schema) as writer:
+        for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunksize):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
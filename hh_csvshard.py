@@ -0,0 +1,128 @@
+"""
+Чтение CSV с произвольного смещения и нарезка файла на куски по границам записей.
+
+Граница записи — перевод строки вне кавычек. В корректном CSV кавычка внутри
+поля удваивается, поэтому чётность числа `"` от начала данных говорит, внутри
+поля мы или нет. К куску приклеивается заголовок файла, и pandas видит обычный
+CSV — так один файл можно разобрать в нескольких процессах.
+"""
+import io
+
+import pandas as pd
+
+BLOCK = 1 << 20
+
+
+class ByteRange(io.RawIOBase):
+    """Файл как поток: сначала prefix (заголовок CSV), затем байты [start, stop)."""
+
+    def __init__(self, path, prefix: bytes, start: int, stop: int):
+        self.file = open(path, "rb")
+        self.file.seek(start)
+        self.prefix = prefix
+        self.left = stop - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        if self.prefix:
+            n = min(len(buf), len(self.prefix))
+            buf[:n] = self.prefix[:n]
+            self.prefix = self.prefix[n:]
+            return n
+        data = self.file.read(min(len(buf), self.left))
+        buf[:len(data)] = data
+        self.left -= len(data)
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def read_header_bytes(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+def read_range(path, start: int, stop: int, header: bytes = None, **kwargs) -> pd.DataFrame:
+    """pd.read_csv по байтам [start, stop) с заголовком файла; kwargs уходят в read_csv."""
+    if header is None:
+        header = read_header_bytes(path)
+    with io.BufferedReader(ByteRange(path, header, start, stop)) as stream:
+        return pd.read_csv(stream, **kwargs)
+
+
+def iter_range(path, start: int, stop: int, header: bytes = None, chunksize: int = 50_000, **kwargs):
+    """То же, что read_range, но кусками по chunksize строк."""
+    if header is None:
+        header = read_header_bytes(path)
+    with io.BufferedReader(ByteRange(path, header, start, stop)) as stream:
+        yield from pd.read_csv(stream, chunksize=chunksize, **kwargs)
+
+
+def records_end(path, start: int, stop: int) -> int:
+    """
+    Конец последней целой CSV-записи в [start, stop): позиция после последнего
+    перевода строки вне кавычек. Недописанный хвост оставляем следующему запуску.
+    """
+    end = start
+    quotes = 0  # кавычек от start — чётное число значит «вне поля»
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < stop:
+            block = f.read(min(stop - pos, BLOCK))
+            if not block:
+                break
+            nl = block.rfind(b"\n")
+            while nl >= 0 and (quotes + block.count(b'"', 0, nl)) % 2:
+                nl = block.rfind(b"\n", 0, nl)
+            if nl >= 0:
+                end = pos + nl + 1
+            quotes += block.count(b'"')
+            pos += len(block)
+    return end
+
+
+def iter_ranges(path, range_bytes: int):
+    """
+    Куски данных [start, stop) примерно по range_bytes, по мере чтения файла:
+    первый кусок отдаётся, как только просканированы его байты, а не весь файл.
+    """
+    with open(path, "rb") as f:
+        cut = len(f.readline())
+        size = f.seek(0, io.SEEK_END)
+        target = cut + max(range_bytes, 1)
+        quotes = 0
+        pos = f.seek(cut)
+        while target < size and pos < size:
+            block = f.read(BLOCK)
+            end = pos + len(block)
+            while target < end:
+                i = block.find(b"\n", target - pos)
+                while i >= 0 and (quotes + block.count(b'"', 0, i)) % 2:
+                    i = block.find(b"\n", i + 1)
+                if i < 0:
+                    target = end  # граница — в следующем блоке
+                    break
+                yield cut, pos + i + 1
+                cut = pos + i + 1
+                target = cut + max(range_bytes, 1)
+            quotes += block.count(b'"')
+            pos = end
+        if cut < size:
+            yield cut, size
+
+
+def split_ranges(path, parts: int, min_bytes: int = 4 * BLOCK) -> list:
+    """
+    Делит данные файла (всё после заголовка) на не более чем parts кусков
+    [start, stop) не меньше min_bytes, разрезая только на границах записей.
+    """
+    with open(path, "rb") as f:
+        header = len(f.readline())
+        data_size = f.seek(0, io.SEEK_END) - header
+    range_bytes = max(-(-data_size // max(parts, 1)), min_bytes)
+    return list(iter_ranges(path, range_bytes))
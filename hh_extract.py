@@ -0,0 +1,183 @@
+"""
+Декларативное описание плоской таблицы по вложенным полям дампа.
+
+Спецификация — список полей (колонка результата, колонка дампа, путь, тип):
+
+    ("city", "address", "city", None)           # address → city, тип выведет pandas
+    ("salary_from", "salary", "from", "float")  # с приведением типа
+    ("id", "id", None, None)                    # путь None — значение колонки как есть
+    ("gender", None, None, None)                # колонка None — вычисляемое поле (derived)
+
+Путь — ключи через точку, как у sorting_data_by_field.get: списки по дороге
+заменяются первым элементом, всё, что не словарь, даёт None.
+
+ExtractionPlan компилирует спецификацию один раз: пути разбираются в функции
+доступа, поля группируются по колонкам дампа, и каждая колонка проходит один
+раз — различные значения разбираются (hh_parse.parse_column), к ним
+применяются все функции доступа этой колонки, а результат раскладывается по
+строкам через коды factorize. Новое поле в той же колонке добавляет проход по
+уникальным значениям, а не по строкам.
+
+Ту же спецификацию можно держать в YAML или JSON (load_spec):
+
+    - {name: city, column: address, path: city}
+    - {name: salary_from, column: salary, path: from, type: float}
+    - {name: gender}                 # вычисляемое поле по имени
+    - {name: sex, derive: gender}    # то же под другим именем
+"""
+import json
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from hh_factor import spread
+from hh_parse import parse_column
+
+Field = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+def _json_or_value(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+
+
+BOOLS = {"true": True, "1": True, "false": False, "0": False}
+
+# тип → приведение колонки результата; None в спецификации — без приведения
+CASTS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    "str": lambda s: s.astype("string"),
+    "float": lambda s: pd.to_numeric(s, errors="coerce").astype("float64"),
+    "int": lambda s: pd.to_numeric(s, errors="coerce").astype("Int64"),
+    "bool": lambda s: s.map(lambda v: BOOLS.get(str(v).lower()) if pd.notna(v) else None).astype("boolean"),
+    "category": lambda s: s.astype("category"),
+    "json": lambda s: s.map(_json_or_value),
+}
+
+
+def compile_path(path: str) -> Callable:
+    """Функция доступа по пути: ключи разбираются один раз, а не на каждой ячейке."""
+    keys = tuple(path.split("."))
+
+    if len(keys) == 1:
+        key = keys[0]
+
+        def access(obj):
+            if isinstance(obj, list):
+                obj = obj[0] if obj else None
+            return obj.get(key) if isinstance(obj, dict) else None
+
+        return access
+
+    def access(obj):
+        for key in keys:
+            if isinstance(obj, list):
+                obj = obj[0] if obj else None
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+
+    return access
+
+
+def load_spec(path: str) -> List[Field]:
+    """Спецификация из YAML (.yaml/.yml, нужен PyYAML) или JSON."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("❌ Для спецификации в YAML нужен PyYAML: pip install pyyaml")
+            entries = yaml.safe_load(f)
+        else:
+            entries = json.load(f)
+
+    fields = []
+    for entry in entries or []:
+        if "name" not in entry:
+            raise ValueError(f"field without name: {entry!r}")
+        if entry.get("column") is None:
+            # у вычисляемого поля слот пути занимает derive; type приводит его результат так же
+            fields.append((entry["name"], None, entry.get("derive"), entry.get("type")))
+        else:
+            fields.append((entry["name"], entry["column"], entry.get("path"), entry.get("type")))
+    return fields
+
+
+class ExtractionPlan:
+    """
+    Скомпилированная спецификация. derived — вычисляемые поля:
+    имя → (входы, функция), где входы — пары (колонка дампа, путь),
+    а функция получает их значения списками и возвращает колонку.
+    """
+
+    def __init__(self, fields: Sequence[Field], derived: Optional[Dict[str, tuple]] = None):
+        derived = derived or {}
+        self.fields = list(fields)
+        self.names = [name for name, _, _, _ in self.fields]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"duplicate field names: {self.names}")
+
+        self.sources: Dict[str, list] = {}  # колонка дампа → пути, которые из неё берутся
+        self.derive = {}  # имя поля → (входы, функция)
+        self.types = {}
+        for name, column, path, kind in self.fields:
+            if column is None:
+                key = path or name
+                if key not in derived:
+                    raise ValueError(f"unknown derived field {key!r} for {name!r}")
+                inputs, func = derived[key]
+                self.derive[name] = (inputs, func)
+                for source in inputs:
+                    self._need(*source)
+            else:
+                self._need(column, path)
+            if kind is not None:
+                if kind not in CASTS:
+                    raise ValueError(f"unknown type {kind!r} for {name!r}, expected one of {sorted(CASTS)}")
+                self.types[name] = kind
+        self.accessors = {
+            path: compile_path(path) for paths in self.sources.values() for path in paths if path is not None
+        }
+
+    def _need(self, column: str, path: Optional[str]) -> None:
+        paths = self.sources.setdefault(column, [])
+        if path not in paths:
+            paths.append(path)
+
+    def _column(self, df: pd.DataFrame, column: str, paths: list) -> Dict[tuple, list]:
+        n = len(df)
+        if column not in df.columns:
+            return {(column, path): [None] * n for path in paths}
+        result = {}
+        if None in paths:
+            result[(column, None)] = df[column].tolist()
+        wanted = [path for path in paths if path is not None]
+        if not wanted:
+            return result
+        codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+        parsed = parse_column(uniques)
+        for path in wanted:
+            access = self.accessors[path]
+            result[(column, path)] = spread(codes, (access(obj) for obj in parsed)).tolist()
+        return result
+
+    def run(self, df: pd.DataFrame) -> Dict[str, list]:
+        """Колонки результата списками Python-объектов, в порядке спецификации, без приведения типов."""
+        values = {}
+        for column, paths in self.sources.items():
+            values.update(self._column(df, column, paths))
+        columns = {}
+        for name, column, path, _ in self.fields:
+            if column is None:
+                inputs, func = self.derive[name]
+                columns[name] = func(*(values[source] for source in inputs))
+            else:
+                columns[name] = values[(column, path)]
+        return columns
+
+    def frame(self, columns: Dict[str, list]) -> pd.DataFrame:
+        """DataFrame из колонок run с приведением типов из спецификации."""
+        df = pd.DataFrame(columns)
+        for name, kind in self.types.items():
+            df[name] = CASTS[kind](df[name])
+        return df
@@ -0,0 +1,27 @@
+"""
+Вычисление по различным значениям колонки.
+
+В колонках дампа значения сильно повторяются (валюты, периоды, даты, шаблонные
+тексты), поэтому дорогая функция считается один раз на различное значение, а по
+строкам результат раскладывается через коды pd.factorize. Пропуск (код -1)
+получает значение missing.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+def spread(codes: np.ndarray, table, missing=None, dtype=object) -> np.ndarray:
+    """Значения table (по одному на различное значение) по строкам; код -1 — missing."""
+    values = np.fromiter(itertools.chain(table, [missing]), dtype=dtype)
+    return values[codes]
+
+
+def map_unique(values, compute, missing=None, dtype=object, **factorize_kw) -> np.ndarray:
+    """
+    compute(uniques) → по значению на каждое различное значение values, разложенные
+    по строкам. factorize_kw уходят в pd.factorize (например, use_na_sentinel=False).
+    """
+    codes, uniques = pd.factorize(values, **factorize_kw)
+    return spread(codes, compute(uniques), missing, dtype)
@@ -0,0 +1,94 @@
+"""
+Курсы валют к тенге по датам для data_cleaning_preprocessing.py.
+
+Таблица курсов — локальный CSV (сеть не нужна), по строке на дату и валюту:
+
+    date,currency,rate
+    2025-01-02,USD,525.1
+    2025-01-02,EUR,545.3
+    2025-02-03,USD,517.8
+
+rate — тенге за единицу валюты. Курс действует с даты до следующей записи
+той же валюты. Таблица читается один раз и кэшируется, пока у файла не
+изменятся размер и mtime.
+
+Каждой вакансии курс подбирается на календарную дату published_at одним
+merge_asof по всем строкам сразу. Вакансии раньше первой записи получают
+первый известный курс, вакансии без даты — последний. Валюты, которых нет
+в таблице, берутся из запасного словаря (CURRENCY_RATES), а неизвестные —
+NaN, как и раньше.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from hh_factor import map_unique
+
+FX_FILE = "fx_rates.csv"
+
+
+@lru_cache(maxsize=8)
+def _read_rates(path: str, size: int, mtime_ns: int) -> pd.DataFrame:
+    table = pd.read_csv(path, usecols=["date", "currency", "rate"], dtype={"currency": str, "rate": "float64"})
+    table["date"] = pd.to_datetime(table["date"]).astype("datetime64[ns]")
+    table = table.dropna()
+    if (table["rate"] <= 0).any():
+        raise ValueError(f"{path}: rate must be positive")
+    return table.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def load_rates(path: str = FX_FILE) -> Optional[pd.DataFrame]:
+    """Таблица курсов (date, currency, rate) или None, если файла нет."""
+    if not Path(path).exists():
+        return None
+    stat = Path(path).stat()
+    return _read_rates(str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def publication_dates(published_at) -> pd.Series:
+    """
+    Календарная дата публикации, как её записал hh.ru (2025-07-11T09:46:17+0300 →
+    2025-07-11): курсы устанавливаются на день, а не на момент. Даты с часовым
+    поясом дают ту же местную дату, что и строки, а не дату в UTC. Строки
+    разбираются по различным датам, а не по каждой метке времени.
+    """
+    published_at = pd.Series(published_at).reset_index(drop=True)
+    if published_at.dtype.kind == "M":
+        published_at = published_at.dt.strftime("%Y-%m-%d")
+    days = published_at.astype("str").str.slice(0, 10)
+
+    def parse(uniques):
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format="%Y-%m-%d", errors="coerce")
+        return parsed.to_numpy(dtype="datetime64[ns]")
+
+    return pd.Series(map_unique(days, parse, np.datetime64("NaT", "ns"), "datetime64[ns]"))
+
+
+def rates_on_dates(table: pd.DataFrame, currencies: pd.Series, published_at: pd.Series, fallback: np.ndarray) -> np.ndarray:
+    """
+    Курс к тенге для каждой строки на её published_at. fallback — курсы по строкам
+    без учёта даты: они остаются у валют, которых нет в table.
+    """
+    currency = pd.Series(currencies).reset_index(drop=True).astype("str")
+    when = publication_dates(published_at)
+    result = np.array(fallback, dtype="float64")
+
+    dated = currency.isin(set(table["currency"]))
+    first = table.groupby("currency")["rate"].first()
+    last = table.groupby("currency")["rate"].last()
+
+    rows = np.flatnonzero(dated & when.notna())
+    if len(rows):
+        left = pd.DataFrame({"date": when.iloc[rows].to_numpy(), "currency": currency.iloc[rows].to_numpy(), "row": rows})
+        left = left.sort_values("date", kind="stable")
+        joined = pd.merge_asof(left, table, on="date", by="currency", direction="backward")
+        rate = joined["rate"].fillna(joined["currency"].map(first))  # раньше первой записи
+        result[joined["row"].to_numpy()] = rate.to_numpy()
+
+    undated = np.flatnonzero(dated & when.isna())
+    if len(undated):
+        result[undated] = currency.iloc[undated].map(last).to_numpy()
+    return result
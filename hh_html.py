@@ -0,0 +1,66 @@
+"""
+Быстрое извлечение текста из HTML-описаний вакансий.
+
+html_to_text(html) возвращает то же, что BeautifulSoup(html, "html.parser").get_text(" ", strip=True),
+но без построения дерева. Описания hh.ru — простая разметка (p, ul/li, strong, br),
+поэтому обычный путь — один проход регулярным выражением по тегам: куски текста
+между тегами раскодируются, обрезаются и склеиваются через пробел. Всё, где
+семантика html.parser тоньше (комментарии, CDATA, script/style, числовые и
+неизвестные сущности, «<» вне тега, кавычки в атрибутах), уходит в BeautifulSoup.
+"""
+import html
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.entities import name2codepoint
+
+TAG_RE = re.compile(r"<(?:[a-zA-Z][^<>]*|/[a-zA-Z][^<>]*)>")
+# признаки разметки, для которой нужен полноценный разбор
+UNSAFE_RE = re.compile(r"<[!?]|<(?:script|style|template|textarea|title)\b", re.I)
+ENTITY_RE = re.compile(r"&([a-zA-Z][a-zA-Z0-9]*);")
+SAFE_ENTITIES = frozenset(name2codepoint)
+
+
+def _bs_text(markup: str) -> str:
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, "html.parser").get_text(" ", strip=True)
+
+
+def _fast_text(markup: str):
+    """Текст простой разметки или None, если нужен полный разбор."""
+    if UNSAFE_RE.search(markup):
+        return None
+    tags = TAG_RE.findall(markup)
+    if len(tags) != markup.count("<"):
+        return None  # «<» вне тега html.parser трактует по-своему
+    for tag in tags:
+        if tag.count('"') % 2 or tag.count("'") % 2:
+            return None  # «>» внутри значения атрибута
+    if "&" in markup:
+        names = ENTITY_RE.findall(markup)
+        if len(names) != markup.count("&") or not SAFE_ENTITIES.issuperset(names):
+            return None
+
+    parts = []
+    for chunk in TAG_RE.split(markup):
+        if not chunk:
+            continue
+        if "&" in chunk:
+            chunk = html.unescape(chunk)
+        chunk = chunk.strip()
+        if chunk:
+            parts.append(chunk)
+    return " ".join(parts)
+
+
+def html_to_text(markup) -> str:
+    if not markup:
+        return ""
+    text = _fast_text(markup)
+    return text if text is not None else _bs_text(markup)
+
+
+def html_to_text_many(markups, workers=None, chunksize=64) -> list:
+    """html_to_text для пачки описаний на пуле процессов (workers=None — по числу ядер)."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(html_to_text, markups, chunksize=chunksize))
@@ -0,0 +1,99 @@
+"""
+Компактный персистентный индекс id вакансий.
+
+id hh.ru — целые числа, поэтому индекс — битовая карта: бит i выставлен, если
+id i уже встречался. Файл отображается в память (mmap), так что старт — это
+открытие файла, а проверка членства — одно чтение байта. Около 17 МБ на
+диапазон id до ~134 млн; незаполненные участки файла остаются разреженными.
+Без path индекс живёт только в памяти (bytearray) с тем же интерфейсом.
+id от MAX_ID и выше не принимаются: карта под них заняла бы от 512 МБ, так что
+такие (скорее всего битые) id держат во внешнем множестве (см. merge_csv.SeenIds).
+"""
+import mmap
+import os
+import struct
+
+HEADER = struct.Struct("<8sQ")  # magic, число id
+MAGIC = b"HHIDX\x00\x01\x00"
+MIN_BYTES = 1 << 20
+MAX_ID = 1 << 32  # карта не растёт больше 512 МБ
+
+
+class IdIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self.file = None
+        if path is None:
+            self.buf = bytearray(HEADER.size + MIN_BYTES)
+            HEADER.pack_into(self.buf, 0, MAGIC, 0)
+            self.count = 0
+            return
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(HEADER.size + MIN_BYTES)
+            self.file.write(HEADER.pack(MAGIC, 0))
+            self.file.flush()
+        self.buf = mmap.mmap(self.file.fileno(), 0)
+        magic, self.count = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not an id index")
+
+    def __contains__(self, vid) -> bool:
+        i = int(vid)
+        if i < 0 or i >= MAX_ID:
+            return False  # add такие не принимает
+        pos = HEADER.size + (i >> 3)
+        return pos < len(self.buf) and bool(self.buf[pos] & (1 << (i & 7)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, vid) -> bool:
+        """Отмечает id; True, если его ещё не было."""
+        i = int(vid)
+        if i < 0:
+            raise ValueError(f"negative vacancy id: {vid}")
+        if i >= MAX_ID:
+            raise ValueError(f"vacancy id out of index range: {vid}")
+        pos = HEADER.size + (i >> 3)
+        if pos >= len(self.buf):
+            self._grow(pos + 1)
+        mask = 1 << (i & 7)
+        if self.buf[pos] & mask:
+            return False
+        self.buf[pos] |= mask
+        self.count += 1
+        HEADER.pack_into(self.buf, 0, MAGIC, self.count)
+        return True
+
+    def update(self, vids) -> int:
+        return sum(self.add(v) for v in vids)
+
+    def clear(self):
+        self.buf[HEADER.size:] = bytes(len(self.buf) - HEADER.size)
+        self.count = 0
+        HEADER.pack_into(self.buf, 0, MAGIC, 0)
+
+    def flush(self):
+        if self.file is not None:
+            self.buf.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.buf.close()
+            self.file.close()
+            self.file = None
+
+    def _grow(self, needed: int):
+        size = len(self.buf)
+        while size < needed:
+            size *= 2
+        if self.file is None:
+            self.buf.extend(bytes(size - len(self.buf)))
+            return
+        self.buf.close()
+        self.file.truncate(size)
+        self.buf = mmap.mmap(self.file.fileno(), 0)
@@ -0,0 +1,97 @@
+"""
+Индекс ключевых слов для разметки текстов вакансий (степень, навыки, языки, права…).
+
+Таксономия — список (метка, ключевые слова) в порядке приоритета. Индекс
+строится один раз: слова складываются в префиксное дерево, а дерево
+компилируется в одно регулярное выражение вида ma(?:ster|gistr)|…, так что
+все вхождения всех слов находятся одним проходом в C, без цикла по словам.
+В каждой позиции выражение берёт самое длинное слово; более короткие слова с
+той же позиции — его префиксы, и их приоритет учтён заранее. Следующий поиск
+начинается со следующего символа, поэтому перекрывающиеся слова не теряются.
+
+Совпадение — подстрока в тексте, приведённом к нижнему регистру, как у
+`keyword in text.lower()`.
+"""
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from hh_factor import map_unique
+
+
+def _trie_pattern(node: dict) -> str:
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = f"(?:{body})?"  # слово кончается здесь, но может продолжиться более длинным
+    return body
+
+
+class KeywordIndex:
+    def __init__(self, taxonomy: Sequence[Tuple[str, Iterable[str]]], default: Optional[str] = None):
+        self.labels = [label for label, _ in taxonomy]
+        self.default = default
+        priority = {}  # слово → номера меток, где оно встречается
+        for rank, (_, keywords) in enumerate(taxonomy):
+            for keyword in keywords:
+                priority.setdefault(keyword.lower(), set()).add(rank)
+        if "" in priority:
+            raise ValueError("empty keyword")
+
+        trie = {}
+        for keyword in priority:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        # совпадение в позиции — самое длинное слово; его префиксы-слова тоже найдены
+        self.prefix_ranks = {}
+        for keyword in priority:
+            prefixes = set()
+            for n in range(1, len(keyword) + 1):
+                prefixes |= priority.get(keyword[:n], set())
+            self.prefix_ranks[keyword] = tuple(sorted(prefixes))
+        self.pattern = re.compile(_trie_pattern(trie)) if trie else None
+
+    def _hits(self, text: str):
+        """Для каждого вхождения — номера меток слов, начинающихся в этой позиции."""
+        if not text or self.pattern is None:
+            return
+        text = text.lower()
+        search = self.pattern.search
+        found = search(text)
+        while found is not None:
+            yield self.prefix_ranks[found.group()]
+            found = search(text, found.start() + 1)
+
+    def best(self, text: str) -> Optional[str]:
+        """Метка с наивысшим приоритетом среди найденных или default."""
+        best = len(self.labels)
+        for ranks in self._hits(text):
+            best = min(best, ranks[0])
+            if best == 0:
+                break
+        return self.labels[best] if best < len(self.labels) else self.default
+
+    def all(self, text: str) -> List[str]:
+        """Все найденные метки в порядке приоритета (для навыков, языков и т. п.)."""
+        found = set()
+        for ranks in self._hits(text):
+            found.update(ranks)
+        return [self.labels[rank] for rank in sorted(found)]
+
+    def best_column(self, values) -> pd.Series:
+        """best для колонки: каждая различная строка размечается один раз."""
+        return self._column(self.best, values)
+
+    def all_column(self, values) -> pd.Series:
+        return self._column(self.all, values)
+
+    @staticmethod
+    def _column(func, values) -> pd.Series:
+        values = pd.Series(values, dtype=object)
+        labels = map_unique(values, lambda uniques: (func(value) for value in uniques), func(None))
+        return pd.Series(labels, index=values.index, dtype=object)
@@ -0,0 +1,177 @@
+"""
+Разбор вложенных полей из CSV-дампов.
+
+Сборщики пишут вложенные поля по-разному: 4.py/5.py — JSON, 2.py/3.py —
+str(dict), то есть repr питоновского словаря. parse_json пробует json.loads,
+а потом медленный ast.literal_eval. Здесь формат угадывается один раз на
+колонку (sniff_format), repr разбирается быстрым переводом в JSON
+(parse_repr), а одинаковые строки берутся из ограниченного LRU-кэша.
+Результат parse_cell всегда тот же, что у parse_json.
+"""
+import ast
+import json
+import re
+from functools import lru_cache
+from typing import Any
+
+PARSE_CACHE_SIZE = 65_536
+SNIFF_SAMPLE = 32
+
+# токены repr: строка в одинарных или двойных кавычках, True/False/None и всё прочее
+# (числа, скобки, запятые) до ближайшей кавычки или константы; одиночные суррогаты
+# json.loads пропустит, а ast.literal_eval — нет, поэтому на них токенизация обрывается
+REPR_TOKEN_RE = re.compile(
+    r"'([^'\\\ud800-\udfff]*(?:\\[^\ud800-\udfff][^'\\\ud800-\udfff]*)*)'"
+    r'|"([^"\\\ud800-\udfff]*(?:\\[^\ud800-\udfff][^"\\\ud800-\udfff]*)*)"'
+    r"""|(True|False|None)|([^'"TFN\ud800-\udfff]+)""",
+    re.S,
+)
+REPR_PLAIN_RE = re.compile(r"[-+0-9.eE{}\[\]:,\s]*\Z")
+# всё вне строк у простого repr, где строки разделены одинарными кавычками
+REPR_OUTSIDE_RE = re.compile(r"(?:[-+0-9.eE{}\[\]:,\s']|True|False|None)*\Z")
+SURROGATE_RE = re.compile("[\ud800-\udfff]")
+# экранирование внутри строки repr или голая двойная кавычка (в JSON её надо экранировать)
+REPR_ESCAPE_RE = re.compile(r'\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)|"', re.S)
+REPR_CONSTANTS = {"True": "true", "False": "false", "None": "null"}
+# экранирования, которые repr строки пишет так же, как JSON
+SAME_ESCAPES = {"\\": "\\\\", "n": "\\n", "r": "\\r", "t": "\\t", '"': '\\"'}
+
+
+def parse_json(x: Any) -> Any:
+    if isinstance(x, (dict, list)):
+        return x
+    if not isinstance(x, str) or not x:
+        return {}
+
+    for parser in (json.loads, ast.literal_eval):
+        try:
+            result = parser(x)
+            if isinstance(result, (dict, list)):
+                return result
+        except (ValueError, SyntaxError, json.JSONDecodeError):
+            continue
+
+    return {}
+
+
+def _json_escape(match) -> str:
+    esc = match.group(1)
+    if esc is None:
+        return '\\"'
+    if esc in SAME_ESCAPES:
+        return SAME_ESCAPES[esc]
+    if esc == "'":
+        return "'"
+    if esc[0] == "x":
+        return "\\u00" + esc[1:]
+    if esc[0] == "u" and not 0xD800 <= int(esc[1:], 16) <= 0xDFFF:
+        return "\\" + esc  # одиночные суррогаты JSON склеил бы в пару, а Python — нет
+    if esc[0] == "U":
+        code = int(esc[1:], 16)
+        if code <= 0x10FFFF and not 0xD800 <= code <= 0xDFFF:
+            return chr(code)
+    raise ValueError(f"unsupported escape \\{esc}")
+
+
+def _json_string(body: str) -> str:
+    if "\\" in body or '"' in body:
+        body = REPR_ESCAPE_RE.sub(_json_escape, body)
+    return f'"{body}"'
+
+
+def _parse_simple_repr(x: str):
+    """
+    Частый случай: в строке нет ни двойных кавычек, ни обратных слэшей, значит
+    каждая одинарная кавычка — граница строки. Тогда перевод в JSON — это замена
+    кавычек и констант вне строк, без прохода по токенам.
+    """
+    parts = x.split("'")
+    if len(parts) % 2 == 0 or SURROGATE_RE.search(x):
+        return None
+    outside = "'".join(parts[::2])
+    if not REPR_OUTSIDE_RE.match(outside):
+        return None
+    if len(parts) == 1 and not any(const in outside for const in REPR_CONSTANTS):
+        return None  # ничего питоновского — пусть решает json.loads
+    outside = outside.replace("True", "true").replace("False", "false").replace("None", "null")
+    parts[::2] = outside.split("'")
+    return json.loads('"'.join(parts))
+
+
+def parse_repr(x: str):
+    """
+    Разбор str(dict)/str(list) переводом в JSON и json.loads.
+
+    Возвращает None, если строка не похожа на repr или в ней есть то, что
+    перевод не повторит один в один с ast.literal_eval (кортежи, ключи-числа,
+    редкие экранирования). Строки, которые могут оказаться валидным JSON,
+    тоже отдаются обратно — для них parse_json берёт результат json.loads.
+    """
+    quote = x.find('"')
+    if quote == -1 and "\\" not in x:
+        try:
+            result = _parse_simple_repr(x)
+        except ValueError:
+            return None
+        return result if isinstance(result, (dict, list)) else None
+    if quote != -1 and not -1 < x.find("'") < quote:
+        return None  # первая строка в двойных кавычках — скорее JSON, его разберёт json.loads
+    parts = []
+    pos = 0
+    python_only = False  # встретился токен, которого нет в JSON
+    try:
+        for match in REPR_TOKEN_RE.finditer(x):
+            if match.start() != pos:
+                return None
+            pos = match.end()
+            single, double, const, plain = match.groups()
+            if single is not None:
+                python_only = True
+                parts.append(_json_string(single))
+            elif double is not None:
+                parts.append(_json_string(double))
+            elif const is not None:
+                python_only = True
+                parts.append(REPR_CONSTANTS[const])
+            elif REPR_PLAIN_RE.match(plain):
+                parts.append(plain)
+            else:
+                return None
+        if pos != len(x) or not python_only:
+            return None
+        result = json.loads("".join(parts))
+    except ValueError:
+        return None
+    return result if isinstance(result, (dict, list)) else None
+
+
+def sniff_format(values) -> str:
+    """'repr', если среди первых непустых значений колонки больше str(dict), иначе 'json'."""
+    votes = {"json": 0, "repr": 0}
+    for value in values:
+        if not isinstance(value, str) or not value:
+            continue
+        try:
+            json.loads(value)
+            votes["json"] += 1
+        except ValueError:
+            votes["repr"] += 1
+        if sum(votes.values()) >= SNIFF_SAMPLE:
+            break
+    return "repr" if votes["repr"] > votes["json"] else "json"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_cell(x: str, fmt: str = "json") -> Any:
+    """parse_json с кэшем; для колонок формата 'repr' сначала быстрый parse_repr."""
+    if fmt == "repr":
+        result = parse_repr(x)
+        if result is not None:
+            return result
+    return parse_json(x)
+
+
+def parse_column(values) -> list:
+    """parse_json для всех значений колонки: формат угадывается один раз, строки — через кэш."""
+    fmt = sniff_format(values)
+    return [parse_cell(value, fmt) if isinstance(value, str) else parse_json(value) for value in values]
@@ -0,0 +1,134 @@
+"""
+Схема типов hh_kz_preprocessed.csv для eda_post_preprocess.py и modeling_pipeline.py.
+
+С типами по умолчанию каждая текстовая колонка хранит строку на каждую
+строку таблицы, а числа — float64/int64. Здесь колонки с повторами
+читаются категориями (код в 1–2 байта на строку плюс словарь значений;
+названия, адреса, работодатели и требования — только если значения повторяются),
+internship/nightshift — nullable boolean, published_at — дата,
+id/employer_id — наименьший целый тип, в который они помещаются. Зарплаты
+остаются float64: это цель модели, и её метрики не должны зависеть от схемы;
+float32 (до ~7 значащих цифр) — по запросу, для графиков EDA
+(load_preprocessed(float_dtype=COMPACT_FLOAT)). Почти уникальные тексты
+(url, обычно requirement) остаются строками и занимают большую часть памяти,
+поэтому этапам выгоднее вовсе их не читать (load_preprocessed(columns=...)).
+
+    python3 hh_schema.py              # память по колонкам до и после
+    python3 hh_schema.py --parquet
+    python3 hh_schema.py --columns city,experience,salary_avg_kzt
+    python3 hh_schema.py --compact-float  # зарплаты в float32, как у EDA
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from hh_columnar import CATEGORY_RATIO, columnar_name, read_table
+
+PREPROCESSED_FILE = "hh_kz_preprocessed.csv"
+
+CATEGORIES = [
+    "city",
+    "employment",
+    "experience",
+    "currency",
+    "payment_by",
+    "schedule",
+    "gender",
+    "degree",
+    "work_type",
+    "work_format",
+    "work_schedule_by_days",
+    "working_hours",
+]
+# названия, адреса, работодатели и шаблонные требования повторяются по-разному:
+# категория, только если это выгодно
+MAYBE_CATEGORIES = ["vacancy", "address", "employer", "requirement"]
+BOOLEANS = ["internship", "nightshift"]
+INTEGERS = ["id", "employer_id"]
+FLOATS = ["salary_from_kzt", "salary_to_kzt", "salary_avg_kzt", "salary_hourly_kzt"]
+DATES = ["published_at"]
+FLOAT_DTYPE = "float64"
+COMPACT_FLOAT = "float32"  # для графиков и отчётов, где точность до рубля не нужна
+
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def read_dtypes() -> dict:
+    """Типы, которые read_csv может применить сразу при разборе."""
+    return {**{c: "category" for c in CATEGORIES}, **{c: "boolean" for c in BOOLEANS}}
+
+
+def downcast_int(column: pd.Series) -> pd.Series:
+    """Наименьший целый тип для колонки; с пропусками — nullable (Int8…Int64)."""
+    values = column.dropna()
+    if values.empty or not (values == np.floor(values)).all():
+        return column
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            break
+    name = np.dtype(dtype).name
+    return column.astype(name.capitalize() if column.isna().any() else name)
+
+
+def apply_schema(df: pd.DataFrame, float_dtype: str = FLOAT_DTYPE) -> pd.DataFrame:
+    """Приведение уже загруженной таблицы к схеме (для Parquet и уже прочитанных CSV)."""
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORIES and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+        elif column in MAYBE_CATEGORIES:
+            values = df[column].astype(object)
+            repeated = values.nunique() <= CATEGORY_RATIO * values.notna().sum()
+            df[column] = values.astype("category" if repeated else "str")
+        elif column in BOOLEANS:
+            df[column] = df[column].astype("boolean")
+        elif column in INTEGERS and df[column].dtype.kind in "iuf":
+            df[column] = downcast_int(df[column])
+        elif column in FLOATS:
+            df[column] = df[column].astype(float_dtype)
+        elif column in DATES and df[column].dtype.kind != "M":
+            try:
+                df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601")
+            except ValueError:
+                pass  # непохожие на даты значения — оставляем строки, как были
+    return df
+
+
+def load_preprocessed(path: str = PREPROCESSED_FILE, columns=None, float_dtype: str = FLOAT_DTYPE) -> pd.DataFrame:
+    """hh_kz_preprocessed.csv (или .parquet) сразу со схемой; columns — только эти колонки."""
+    return apply_schema(read_table(path, columns, dtype=read_dtypes()), float_dtype)
+
+
+def memory_mb(df: pd.DataFrame) -> pd.Series:
+    return df.memory_usage(deep=True, index=False) / 2**20
+
+
+def report(path: str, columns=None, float_dtype: str = FLOAT_DTYPE) -> None:
+    """Память по колонкам: типы по умолчанию против схемы (и только columns, если заданы)."""
+    before = memory_mb(read_table(path))
+    df = load_preprocessed(path, columns, float_dtype)
+    after = memory_mb(df)
+    before = before[after.index]
+    print(f"{path}: {len(df)} строк, колонок {len(df.columns)}")
+    print(f"{'колонка':<24}{'тип':>22}{'до, МБ':>10}{'после, МБ':>11}")
+    for column in before.sort_values(ascending=False).index:
+        print(f"{column:<24}{str(df[column].dtype):>22}{before[column]:>10.3f}{after[column]:>11.3f}")
+    print(f"{'итого':<24}{'':>22}{before.sum():>10.3f}{after.sum():>11.3f}  x{before.sum() / after.sum():.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Память hh_kz_preprocessed до и после схемы типов")
+    parser.add_argument("--parquet", action="store_true", help="читать hh_kz_preprocessed.parquet")
+    parser.add_argument("--columns", help="только эти колонки, через запятую (например, колонки модели)")
+    parser.add_argument("--compact-float", action="store_true", help="зарплаты в float32, как у EDA")
+    args = parser.parse_args()
+    columns = args.columns.split(",") if args.columns else None
+    float_dtype = COMPACT_FLOAT if args.compact_float else FLOAT_DTYPE
+    report(columnar_name(PREPROCESSED_FILE) if args.parquet else PREPROCESSED_FILE, columns, float_dtype)
+
+
+if __name__ == "__main__":
+    main()
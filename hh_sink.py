@@ -0,0 +1,128 @@
+"""
+Дозаписываемый CSV-приёмник для сборщиков (2.py, 4.py, 5.py).
+
+Строки только дописываются в конец файла. Порядок колонок хранится в
+`<csv>.schema.json`: новые ключи добавляются в конец схемы, старые колонки
+не переставляются. Увиденные id лежат рядом в `<csv>.idx` (битовая карта
+hh_ids.IdIndex), поэтому старт не требует разбора всего CSV, а чекпоинт стоит
+только новых строк.
+
+Файл всегда описывает себя сам: когда появляется новый ключ, заголовок
+переписывается (одна потоковая перезапись во временный файл и os.replace),
+так что любой читатель CSV видит верные колонки. Схема — только способ не
+разбирать файл при старте. id отмечаются в индексе лишь после того, как их
+строки записаны: упавшая запись не оставит вакансию «уже виденной».
+"""
+import csv
+import json
+import os
+
+from hh_ids import IdIndex
+
+
+class CsvSink:
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.schema_path = f"{path}.schema.json"
+        self.ids_path = f"{path}.idx"
+        # порядок колонок для нового файла; иначе ключи первой пачки по алфавиту
+        self.columns = list(columns or [])
+        self.rows = 0
+
+        schema = self._read_schema()
+        fresh_index = not os.path.exists(self.ids_path)
+        self.seen_ids = IdIndex(self.ids_path)
+        if schema is not None and schema.get("size") == self._size() and not fresh_index:
+            self.columns = schema["columns"]
+            self.rows = schema["rows"]
+        elif os.path.exists(path):
+            # нет схемы или CSV меняли в обход приёмника — один раз пересобираем по файлу
+            self._rebuild_from_csv()
+        else:
+            self.seen_ids.clear()
+
+    def __contains__(self, vid) -> bool:
+        return vid in self.seen_ids
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def append(self, rows) -> int:
+        """Дописывает строки (dict), пропуская уже виденные id; возвращает число записанных."""
+        fresh = []
+        batch = set()
+        for row in rows:
+            if row["id"] not in self.seen_ids and row["id"] not in batch:
+                batch.add(row["id"])
+                fresh.append(row)
+        if not fresh:
+            return 0
+
+        known = set(self.columns)
+        new_columns = sorted({k for r in fresh for k in r} - known)
+        if new_columns:
+            self._grow_columns(new_columns)
+
+        new_file = not os.path.exists(self.path) or self._size() == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns, restval="")
+            if new_file:
+                writer.writeheader()
+            writer.writerows(fresh)
+
+        self.seen_ids.update(row["id"] for row in fresh)
+        self.seen_ids.flush()
+        self.rows += len(fresh)
+        self._write_schema()
+        return len(fresh)
+
+    def _grow_columns(self, new_columns):
+        had_rows = self.rows > 0 and os.path.exists(self.path)
+        old_columns = self.columns
+        self.columns = old_columns + new_columns
+        if not had_rows:
+            return
+        # заголовок CSV фиксирован, поэтому редкое расширение схемы — одна потоковая перезапись
+        tmp = f"{self.path}.tmp"
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            next(reader, None)
+            writer = csv.writer(dst)
+            writer.writerow(self.columns)
+            pad = [""] * len(new_columns)
+            for record in reader:
+                writer.writerow(record + pad)
+        os.replace(tmp, self.path)
+        print(f"🧩 {self.path}: новые колонки {new_columns}")
+
+    def _rebuild_from_csv(self):
+        self.seen_ids.clear()
+        self.rows = 0
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            self.columns = list(reader.fieldnames or [])
+            for row in reader:
+                if row.get("id"):
+                    self.seen_ids.add(row["id"])
+                self.rows += 1
+        self.seen_ids.flush()
+        self._write_schema()
+
+    def close(self):
+        self.seen_ids.close()
+
+    def _size(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def _read_schema(self):
+        if not os.path.exists(self.schema_path):
+            return None
+        with open(self.schema_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_schema(self):
+        tmp = f"{self.schema_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "rows": self.rows, "size": self._size()}, f, ensure_ascii=False)
+        os.replace(tmp, self.schema_path)
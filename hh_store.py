@@ -0,0 +1,228 @@
+"""
+SQLite-хранилище вакансий hh.ru (hh_kz.db), общее для синхронного и async режимов 1.py.
+
+Вставка идёт пачкой за одну транзакцию (executemany + ON CONFLICT DO NOTHING),
+счётчик строк держится в памяти и обновляется по total_changes, поэтому
+стоимость страницы не зависит от размера базы.
+
+Объединение ключей всех payload хранится в таблице vacancy_columns и
+пополняется при вставке, так что экспорт пишет заголовок сразу и идёт потоком.
+
+Рядом с payload лежат типизированные индексированные колонки (NORMALIZED_COLUMNS),
+извлечённые при вставке; query()/frame() фильтруют по ним в SQL без разбора JSON.
+"""
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DB_PATH = "hh_kz.db"
+EXPORT_CHUNK = 1000
+
+# колонка → (тип SQLite, путь в payload)
+NORMALIZED_COLUMNS = {
+    "name": ("TEXT", ("name",)),
+    "published_at": ("TEXT", ("published_at",)),
+    "salary_from": ("INTEGER", ("salary", "from")),
+    "salary_to": ("INTEGER", ("salary", "to")),
+    "salary_currency": ("TEXT", ("salary", "currency")),
+    "area_id": ("TEXT", ("area", "id")),
+    "area_name": ("TEXT", ("area", "name")),
+    "employer_id": ("TEXT", ("employer", "id")),
+    "employer_name": ("TEXT", ("employer", "name")),
+    "experience": ("TEXT", ("experience", "id")),
+    "schedule": ("TEXT", ("schedule", "id")),
+    "employment": ("TEXT", ("employment", "id")),
+}
+INDEXED_COLUMNS = (
+    "published_at", "salary_currency", "salary_from", "area_id",
+    "employer_id", "experience", "schedule", "employment",
+)
+
+
+def to_utc(value):
+    """2025-12-24T09:46:17+0300 → 2025-12-24T06:46:17Z, чтобы строки сравнивались как время."""
+    if not value:
+        return None
+    try:
+        dt = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+    except ValueError:
+        return value
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def extract(item: dict, path):
+    value = item
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return None if isinstance(value, (dict, list)) else value
+
+
+def normalized_values(item: dict) -> tuple:
+    values = []
+    for column, (_, path) in NORMALIZED_COLUMNS.items():
+        value = extract(item, path)
+        values.append(to_utc(value) if column == "published_at" else value)
+    return tuple(values)
+
+
+INSERT_SQL = (
+    f"INSERT INTO vacancies (id, payload, {', '.join(NORMALIZED_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(NORMALIZED_COLUMNS) + 2))}) ON CONFLICT(id) DO NOTHING"
+)
+
+
+class VacancyStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.con = sqlite3.connect(path)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS vacancies (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL
+            )
+        """)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS vacancy_columns (
+                name TEXT PRIMARY KEY
+            )
+        """)
+        self.con.create_function("hh_utc", 1, to_utc, deterministic=True)
+        self.migrate_normalized()
+        self.con.commit()
+        (n,) = self.con.execute("SELECT COUNT(*) FROM vacancies").fetchone()
+        self.count = int(n)
+
+        self.known_columns = {name for (name,) in self.con.execute("SELECT name FROM vacancy_columns")}
+        if not self.known_columns and self.count:
+            # база создана до появления vacancy_columns — один раз собираем ключи в SQL
+            with self.con:
+                self.con.execute("""
+                    INSERT OR IGNORE INTO vacancy_columns (name)
+                    SELECT DISTINCT j.key FROM vacancies, json_each(vacancies.payload) AS j
+                """)
+            self.known_columns = {name for (name,) in self.con.execute("SELECT name FROM vacancy_columns")}
+
+    def migrate_normalized(self):
+        """Добавляет недостающие типизированные колонки и заполняет их из payload средствами SQL."""
+        existing = {row[1] for row in self.con.execute("PRAGMA table_info(vacancies)")}
+        missing = [c for c in NORMALIZED_COLUMNS if c not in existing]
+        for column in missing:
+            self.con.execute(f"ALTER TABLE vacancies ADD COLUMN {column} {NORMALIZED_COLUMNS[column][0]}")
+        if missing:
+            assignments = []
+            for column in missing:
+                expr = "json_extract(payload, '$." + ".".join(NORMALIZED_COLUMNS[column][1]) + "')"
+                assignments.append(f"{column} = " + (f"hh_utc({expr})" if column == "published_at" else expr))
+            self.con.execute("UPDATE vacancies SET " + ", ".join(assignments))
+        for column in INDEXED_COLUMNS:
+            self.con.execute(f"CREATE INDEX IF NOT EXISTS idx_vacancies_{column} ON vacancies ({column})")
+
+    def upsert_many(self, items) -> int:
+        rows = [
+            (str(it["id"]), json.dumps(it, ensure_ascii=False)) + normalized_values(it)
+            for it in items
+            if it.get("id") not in (None, "")
+        ]
+        if not rows:
+            return 0
+        new_columns = {k for it in items for k in it} - self.known_columns
+        before = self.con.total_changes
+        with self.con:
+            self.con.executemany(INSERT_SQL, rows)
+            inserted = self.con.total_changes - before
+            if new_columns:
+                self.con.executemany(
+                    "INSERT OR IGNORE INTO vacancy_columns (name) VALUES (?)",
+                    [(k,) for k in new_columns],
+                )
+        self.known_columns |= new_columns
+        self.count += inserted
+        return inserted
+
+    @contextmanager
+    def snapshot(self):
+        """Читающая транзакция: в WAL экспорт видит согласованный срез, пока сборщик пишет."""
+        self.con.execute("BEGIN")
+        try:
+            yield self
+        finally:
+            self.con.execute("COMMIT")
+
+    def columns(self) -> list:
+        return sorted(name for (name,) in self.con.execute("SELECT name FROM vacancy_columns"))
+
+    def iter_payloads(self, chunk=EXPORT_CHUNK):
+        cur = self.con.execute("SELECT payload FROM vacancies ORDER BY rowid")
+        while True:
+            batch = cur.fetchmany(chunk)
+            if not batch:
+                break
+            for (payload,) in batch:
+                yield json.loads(payload)
+
+    def query(self, columns=None, published_from=None, published_to=None, salary_min=None,
+              order_by="published_at", limit=None, **equals):
+        """
+        Итератор по строкам (dict) из типизированных колонок.
+        published_from/published_to — границы в UTC (ISO), salary_min — по salary_from или salary_to,
+        остальные именованные фильтры — равенство, например query(salary_currency="KZT", schedule="remote").
+        """
+        sql, params = self._select_sql(columns, published_from, published_to, salary_min, order_by, limit, equals)
+        cur = self.con.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        while True:
+            batch = cur.fetchmany(EXPORT_CHUNK)
+            if not batch:
+                break
+            for row in batch:
+                yield dict(zip(names, row))
+
+    def frame(self, columns=None, published_from=None, published_to=None, salary_min=None,
+              order_by="published_at", limit=None, **equals):
+        """То же, что query(), но сразу pandas.DataFrame."""
+        import pandas as pd
+
+        sql, params = self._select_sql(columns, published_from, published_to, salary_min, order_by, limit, equals)
+        return pd.read_sql_query(sql, self.con, params=params)
+
+    def _select_sql(self, columns, published_from, published_to, salary_min, order_by, limit, equals):
+        allowed = {"id", *NORMALIZED_COLUMNS}
+        columns = list(columns or ["id", *NORMALIZED_COLUMNS])
+        unknown = (set(columns) | set(equals) | ({order_by} if order_by else set())) - allowed
+        if unknown:
+            raise ValueError(f"unknown vacancy columns: {sorted(unknown)}")
+
+        where, params = [], []
+        for column, value in equals.items():
+            if value is None:
+                where.append(f"{column} IS NULL")
+            else:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if published_from is not None:
+            where.append("published_at >= ?")
+            params.append(published_from)
+        if published_to is not None:
+            where.append("published_at < ?")
+            params.append(published_to)
+        if salary_min is not None:
+            where.append("(salary_from >= ? OR salary_to >= ?)")
+            params.extend([salary_min, salary_min])
+
+        sql = f"SELECT {', '.join(columns)} FROM vacancies"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return sql, params
+
+    def close(self):
+        self.con.close()
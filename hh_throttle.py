@@ -0,0 +1,147 @@
+"""
+Общий троттлинг запросов к hh.ru для всех сборщиков.
+
+Token bucket задаёт темп, AIMD его подстраивает: после каждого успешного ответа
+темп растёт на `increase` rps (не выше `max_rate`, по умолчанию — заданного `rate`),
+после 429/403 — умножается на `decrease`.
+Retry-After из ответа уважается как общая пауза для всех потоков/корутин.
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+THROTTLE_STATUSES = (429, 403)
+MAX_RETRIES = 8
+
+
+def parse_retry_after(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Throttle:
+    def __init__(
+        self,
+        rate: float = 3.0,
+        min_rate: float = 0.2,
+        max_rate: float | None = None,
+        burst: float = 1.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        backoff: float = 1.0,
+        max_backoff: float = 120.0,
+        name: str = "hh.ru",
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        # без явного max_rate темп не поднимается выше заданного: AIMD только восстанавливается после 429/403
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.name = name
+
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.pause_until = 0.0
+        self.strikes = 0
+        self.lock = threading.Lock()
+
+        self.started = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self.wall_waited = 0.0
+        self.covered_until = 0.0
+
+    def reserve(self) -> float:
+        """Бронирует токен и возвращает, сколько секунд нужно подождать до запроса."""
+        with self.lock:
+            now = time.monotonic()
+            # во время паузы ведро стоит в её конце (updated в будущем) и до него не пополняется
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+            self.tokens -= 1.0
+            delay = self.updated - now + (-self.tokens / self.rate if self.tokens < 0 else 0.0)
+            delay = max(delay, self.pause_until - now)
+            self.requests += 1
+            self.waited += delay
+            # wall-clock, в течение которого хоть кто-то ждал троттлинг (без двойного счёта параллельных)
+            end = now + delay
+            if end > self.covered_until:
+                self.wall_waited += end - max(now, self.covered_until)
+                self.covered_until = end
+            return delay
+
+    def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.strikes = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, status: int, retry_after=None) -> float:
+        """Мультипликативно снижает темп и ставит общую паузу; возвращает её длину."""
+        pause = parse_retry_after(retry_after)
+        with self.lock:
+            now = time.monotonic()
+            self.throttled += 1
+            old_rate = self.rate
+            # пачка отказов на запросы, ушедшие до начала паузы, — одно событие перегрузки
+            if now >= self.pause_until:
+                self.strikes += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            if pause is None:
+                pause = min(self.max_backoff, self.backoff * 2 ** (self.strikes - 1))
+            self.pause_until = max(self.pause_until, now + pause)
+            # ведро начинает заново с конца паузы: ждущие выходят по одному через 1/rate, а не пачкой
+            self.updated = max(self.updated, self.pause_until)
+            self.tokens = min(self.tokens, 0.0)
+        if self.rate != old_rate:
+            print(f"⏳ {self.name}: HTTP {status} — пауза {pause:.1f} сек, темп {old_rate:.2f} → {self.rate:.2f} rps")
+        return pause
+
+    def report(self) -> str:
+        elapsed = time.monotonic() - self.started
+        share = min(self.wall_waited, elapsed) / elapsed * 100 if elapsed > 0 else 0.0
+        return (
+            f"🚦 {self.name}: запросов {self.requests}, 429/403: {self.throttled}, "
+            f"ожидание троттлинга {self.wall_waited:.1f} сек из {elapsed:.1f} сек ({share:.0f}%), "
+            f"суммарно по запросам {self.waited:.1f} сек, темп {self.rate:.2f} rps"
+        )
+
+
+def throttled_get(throttle: Throttle, url: str, session=None, max_retries: int = MAX_RETRIES, **kwargs):
+    """requests.get через троттлинг; на 429/403 ждёт и повторяет, в конце отдаёт последний ответ."""
+    http = session or requests
+    for _ in range(max_retries + 1):
+        throttle.wait()
+        r = http.get(url, **kwargs)
+        if r.status_code in THROTTLE_STATUSES:
+            throttle.on_throttled(r.status_code, r.headers.get("Retry-After"))
+            continue
+        throttle.on_success()
+        return r
+    return r
@@ -1,29 +1,368 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import pandas as pd
 
+from hh_columnar import columnar_name, csv_to_columnar
+from hh_csvshard import BLOCK, iter_range, read_header_bytes, read_range, records_end, split_ranges
+from hh_ids import MAX_ID, IdIndex
 
-def main() -> None:
-    workdir = Path(__file__).resolve().parent
-    merged_path = workdir / "hh_kz_combined.csv"
-    csv_files = sorted(
+CHUNKSIZE = 50_000
+RANGE_BYTES = 16 * BLOCK  # кусок файла на один процесс в --workers
+ROW_END = "\x1e\n"  # временный конец строки, по которому рабочий режет готовый CSV на записи
+
+
+class SeenIds:
+    """Множество увиденных id: числовые до MAX_ID — в битовой карте, прочие (и пустые) — в обычном set."""
+
+    def __init__(self, path=None, other=()):
+        self.bits = IdIndex(path)
+        self.other = set(other)
+
+    def add(self, vid) -> bool:
+        if not isinstance(vid, str):
+            vid = None  # строки без колонки id, как NaN в drop_duplicates
+        elif vid.isascii() and vid.isdecimal() and (vid == "0" or vid[0] != "0") and int(vid) < MAX_ID:
+            return self.bits.add(vid)
+        if vid in self.other:
+            return False
+        self.other.add(vid)
+        return True
+
+
+# результаты следующих этапов лежат рядом и тоже подходят под hh_kz*.csv, но это не дампы
+DERIVED_FILES = {"hh_kz_sorted.csv", "hh_kz_preprocessed.csv"}
+
+
+def source_files(workdir: Path, merged_path: Path) -> list:
+    return sorted(
         f
         for f in workdir.glob("hh_kz*.csv")
-        if f.resolve() != merged_path.resolve()
+        if f.resolve() != merged_path.resolve() and f.name not in DERIVED_FILES
     )
+
+
+def read_header(path: Path) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def unified_columns(csv_files) -> list:
+    """Объединение заголовков в порядке появления — как у pd.concat(..., sort=False)."""
+    columns = []
+    seen = set()
+    for csv_file in csv_files:
+        for column in read_header(csv_file):
+            if column not in seen:
+                seen.add(column)
+                columns.append(column)
+    return columns
+
+
+def merge_in_memory(csv_files, merged_path: Path) -> None:
     outputs = []
     for csv_file in csv_files:
         outputs.append(pd.read_csv(csv_file, dtype=str, keep_default_na=False))
 
-    if not outputs:
-        raise SystemExit("no CSV files found to combine")
-
     combined = pd.concat(outputs, ignore_index=True, sort=False)
 
     if "id" not in combined.columns:
         raise SystemExit("missing `id` column in merged CSVs")
     combined = combined.drop_duplicates(subset="id", keep="first")
-    combined.to_csv(workdir / "hh_kz_combined.csv", index=False)
+    combined.to_csv(merged_path, index=False)
+
+
+def merge_streaming(csv_files, merged_path: Path, chunksize: int = CHUNKSIZE) -> None:
+    """
+    Тот же результат, что merge_in_memory, но источники читаются кусками,
+    а дубликаты отсекаются по компактному множеству id (побеждает первая строка).
+    """
+    columns = unified_columns(csv_files)
+    if "id" not in columns:
+        raise SystemExit("missing `id` column in merged CSVs")
+
+    seen = SeenIds()
+    header = True
+    with open(merged_path, "w", newline="", encoding="utf-8") as out:
+        for csv_file in csv_files:
+            for chunk in pd.read_csv(csv_file, dtype=str, keep_default_na=False, chunksize=chunksize):
+                ids = chunk["id"] if "id" in chunk.columns else [None] * len(chunk)
+                keep = [seen.add(vid) for vid in ids]
+                chunk = chunk[keep].reindex(columns=columns)
+                chunk.to_csv(out, header=header, index=False)
+                header = False
+        if header:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+
+
+def render_range(task):
+    """
+    Рабочий процесс --workers: разбирает байты [start, stop) одного источника и
+    возвращает id строк и сами строки уже в CSV-виде с колонками результата —
+    запись в to_csv дороже разбора, поэтому её тоже делают рабочие.
+    """
+    path, start, stop, columns = task
+    chunk = read_range(path, start, stop, dtype=str, keep_default_na=False)
+    ids = chunk["id"].tolist() if "id" in chunk.columns else [None] * len(chunk)
+    chunk = chunk.reindex(columns=columns)
+    lines = chunk.to_csv(header=False, index=False, lineterminator=ROW_END).split(ROW_END)[:-1]
+    if len(lines) != len(chunk):
+        return ids, chunk  # ROW_END встретился внутри поля — пусть пишет главный процесс
+    return ids, lines
+
+
+def merge_parallel(csv_files, merged_path: Path, workers: int = None, range_bytes: int = RANGE_BYTES) -> None:
+    """
+    Тот же результат, что merge_streaming, но источники разбираются на пуле процессов:
+    по куску [start, stop) на задачу, крупные файлы режутся по границам записей.
+    Результаты забираются строго в порядке задач, так что «побеждает первая строка»
+    работает как в последовательном прогоне.
+    """
+    columns = unified_columns(csv_files)
+    if "id" not in columns:
+        raise SystemExit("missing `id` column in merged CSVs")
+
+    tasks = []
+    for csv_file in csv_files:
+        parts = csv_file.stat().st_size // range_bytes + 1
+        tasks += [(csv_file, start, stop, columns) for start, stop in split_ranges(csv_file, parts)]
+
+    workers = workers or os.cpu_count()
+    seen = SeenIds()
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(merged_path, "w", newline="", encoding="utf-8") as out:
+        pd.DataFrame(columns=columns).to_csv(out, index=False)
+        pending = deque()  # не больше 2×workers готовых кусков в памяти
+        for task in tasks:
+            pending.append(pool.submit(render_range, task))
+            if len(pending) >= 2 * workers:
+                write_rendered(out, pending.popleft().result(), seen)
+        while pending:
+            write_rendered(out, pending.popleft().result(), seen)
+
+
+def write_rendered(out, rendered, seen: SeenIds) -> None:
+    ids, rows = rendered
+    keep = [seen.add(vid) for vid in ids]
+    if isinstance(rows, pd.DataFrame):
+        rows[keep].to_csv(out, header=False, index=False)
+    else:
+        out.write("".join(line + "\n" for line, k in zip(rows, keep) if k))
+
+
+def file_digest(path: Path, stop: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while stop > 0:
+            block = f.read(min(stop, BLOCK))
+            if not block:
+                break
+            digest.update(block)
+            stop -= len(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Состояние инкрементального слияния рядом с результатом:
+    `<csv>.manifest.json` — по каждому источнику размер, mtime, sha256 и смещение
+    уже слитых байт; `<csv>.idx` — битовая карта увиденных id.
+    """
+
+    def __init__(self, merged_path: Path):
+        self.merged_path = merged_path
+        self.path = Path(f"{merged_path}.manifest.json")
+        self.ids_path = Path(f"{merged_path}.idx")
+        self.sources = {}
+        self.columns = []
+        self.other_ids = []
+        self.output_size = None
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.sources = state["sources"]
+            self.columns = state["columns"]
+            self.other_ids = state["other_ids"]
+            self.output_size = state["output_size"]
+
+    def usable(self) -> bool:
+        """Результат и индекс id те же, что записал прошлый запуск."""
+        return (
+            self.output_size is not None
+            and self.ids_path.exists()
+            and self.merged_path.exists()
+            and self.merged_path.stat().st_size == self.output_size
+        )
+
+    def status(self, csv_file: Path) -> str:
+        """new / same / appended / rewritten относительно уже слитого префикса."""
+        entry = self.sources.get(csv_file.name)
+        if entry is None:
+            return "new"
+        st = csv_file.stat()
+        if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime"]:
+            return "same"
+        if st.st_size < entry["offset"] or file_digest(csv_file, entry["offset"]) != entry["sha256"]:
+            return "rewritten"
+        return "appended" if st.st_size > entry["offset"] else "same"
+
+    def reset(self):
+        self.sources = {}
+        self.columns = []
+        self.other_ids = []
+        self.output_size = None
+        for path in (self.path, self.ids_path, self.merged_path):
+            if path.exists():
+                path.unlink()
+
+    def discard(self):
+        """Результат пересоздан в обход манифеста — состояние больше не соответствует ему."""
+        for path in (self.path, self.ids_path):
+            if path.exists():
+                path.unlink()
+
+    def save(self, seen: SeenIds):
+        self.other_ids = sorted(seen.other, key=lambda v: (v is not None, v or ""))
+        self.output_size = self.merged_path.stat().st_size
+        tmp = Path(f"{self.path}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "columns": self.columns,
+                    "output_size": self.output_size,
+                    "other_ids": self.other_ids,
+                    "sources": self.sources,
+                },
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        os.replace(tmp, self.path)
+
+
+def grow_output(merged_path: Path, old_columns: list, columns: list) -> None:
+    """Новые колонки дописываются в конец заголовка: одна потоковая перезапись результата."""
+    pad = [""] * (len(columns) - len(old_columns))
+    tmp = Path(f"{merged_path}.tmp")
+    with open(merged_path, newline="", encoding="utf-8") as src, \
+            open(tmp, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.reader(src)
+        next(reader, None)
+        writer = csv.writer(dst, lineterminator="\n")  # как у DataFrame.to_csv
+        writer.writerow(columns)
+        for record in reader:
+            writer.writerow(record + pad)
+    os.replace(tmp, merged_path)
+
+
+def merge_incremental(csv_files, merged_path: Path, chunksize: int = CHUNKSIZE) -> None:
+    """
+    Сливает только новые источники и дописанные хвосты старых, добавляя в конец
+    результата ещё не виденные id. Если уже слитый источник переписан (или удалён),
+    результат пересобирается с нуля.
+    """
+    manifest = Manifest(merged_path)
+    names = {f.name for f in csv_files}
+    if not manifest.usable():
+        print("🧱 манифеста нет или результат менялся в обход него — полная пересборка")
+        manifest.reset()
+    statuses = {f: manifest.status(f) for f in csv_files}
+    gone = sorted(set(manifest.sources) - names)
+    rewritten = [f.name for f, status in statuses.items() if status == "rewritten"]
+    if gone or rewritten:
+        print(f"🧱 переписаны {rewritten}, удалены {gone} — полная пересборка")
+        manifest.reset()
+        statuses = {f: "new" for f in csv_files}
+
+    pending = [f for f in csv_files if statuses[f] in ("new", "appended")]
+    if not pending:
+        print(f"✅ {merged_path.name}: новых данных нет")
+        return
+
+    old_columns = manifest.columns
+    columns = list(old_columns)
+    for csv_file in pending:
+        columns += [c for c in read_header(csv_file) if c not in columns]
+    if "id" not in columns:
+        raise SystemExit("missing `id` column in merged CSVs")
+    if columns != old_columns and merged_path.exists():
+        grow_output(merged_path, old_columns, columns)
+    manifest.columns = columns
+
+    seen = SeenIds(manifest.ids_path, manifest.other_ids)
+    added = 0
+    with open(merged_path, "a", newline="", encoding="utf-8") as out:
+        if out.tell() == 0:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+        for csv_file in pending:
+            st = csv_file.stat()
+            header = read_header_bytes(csv_file)
+            entry = manifest.sources.get(csv_file.name, {"offset": 0})
+            start = max(entry["offset"], len(header))
+            stop = records_end(csv_file, start, st.st_size)
+            if stop > start:
+                for chunk in iter_range(csv_file, start, stop, header, chunksize, dtype=str, keep_default_na=False):
+                    ids = chunk["id"] if "id" in chunk.columns else [None] * len(chunk)
+                    keep = [seen.add(vid) for vid in ids]
+                    chunk = chunk[keep].reindex(columns=columns)
+                    chunk.to_csv(out, header=False, index=False)
+                    added += len(chunk)
+            manifest.sources[csv_file.name] = {
+                "size": st.st_size,
+                "mtime": st.st_mtime_ns,
+                "sha256": file_digest(csv_file, stop),
+                "offset": stop,
+            }
+            print(f"📥 {csv_file.name}: {statuses[csv_file]}, байт {start}–{stop}")
+
+    seen.bits.flush()
+    manifest.save(seen)
+    seen.bits.close()
+    print(f"✅ {merged_path.name}: +{added} строк")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Объединение hh_kz*.csv в hh_kz_combined.csv без повторов по id")
+    parser.add_argument("--stream", action="store_true", help="читать источники кусками (память не растёт с объёмом)")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="строк в куске для --stream/--incremental")
+    parser.add_argument("--workers", type=int, default=0, help="разбирать источники на N процессах (0 — в одном)")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="сливать только новые источники и дописанные хвосты (манифест hh_kz_combined.csv.manifest.json)",
+    )
+    parser.add_argument("--parquet", action="store_true", help="ещё и hh_kz_combined.parquet для следующих этапов")
+    args = parser.parse_args()
+
+    workdir = Path(__file__).resolve().parent
+    merged_path = workdir / "hh_kz_combined.csv"
+    csv_files = source_files(workdir, merged_path)
+
+    if not csv_files:
+        raise SystemExit("no CSV files found to combine")
+
+    if args.incremental:
+        merge_incremental(csv_files, merged_path, args.chunksize)
+    else:
+        Manifest(merged_path).discard()
+        if args.workers:
+            merge_parallel(csv_files, merged_path, args.workers)
+        elif args.stream:
+            merge_streaming(csv_files, merged_path, args.chunksize)
+        else:
+            merge_in_memory(csv_files, merged_path)
+
+    if args.parquet:
+        # CSV остаётся основным результатом: на нём держатся манифест и --incremental
+        parquet_path = columnar_name(merged_path)
+        csv_to_columnar(merged_path, parquet_path, args.chunksize)
+        print(f"✅ {Path(parquet_path).name} создан")
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+import argparse
+import time
+
 import numpy as np
 import matplotlib
 matplotlib.use("Agg")
@@ -7,17 +10,26 @@ import seaborn as sns
 from pathlib import Path
 
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from hh_columnar import columnar_name
+from hh_schema import load_preprocessed, memory_mb
 
 
 INPUT_FILE = "hh_kz_preprocessed.csv"
 OUTPUT_DIR = "model_outputs"
 
+# dense — one-hot densified before the models (the original setup);
+# sparse — the one-hot design matrix stays sparse through scaler and models;
+# hgb — no one-hot at all: ordinal codes + HistGradientBoosting with native categorical splits
+MODES = ("dense", "sparse", "hgb")
+HGB_MAX_CATEGORIES = 255  # HistGradientBoosting needs fewer categories than max_bins; rarer ones are pooled
+
 
 def categorize_experience(value: str) -> str:
     if pd.isna(value):
@@ -36,25 +48,77 @@ def categorize_experience(value: str) -> str:
     return "Other"
 
 
-def build_preprocessor(categorical_features, numeric_features):
+def build_preprocessor(categorical_features, numeric_features, sparse=False):
     return ColumnTransformer(
         transformers=[
             ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
             ("num", "passthrough", numeric_features),
         ],
         remainder="drop",
+        sparse_threshold=1.0 if sparse else 0.0,
+    )
+
+
+def build_ordinal_preprocessor(categorical_features, numeric_features):
+    """Categories as integer codes (categorical columns first) for native categorical splits."""
+    encoder = OrdinalEncoder(
+        handle_unknown="use_encoded_value",
+        unknown_value=np.nan,
+        max_categories=HGB_MAX_CATEGORIES,
+    )
+    return ColumnTransformer(
+        transformers=[
+            ("cat", encoder, categorical_features),
+            ("num", "passthrough", numeric_features),
+        ],
+        remainder="drop",
         sparse_threshold=0.0,
     )
 
 
+def make_pipeline(model, categorical_features, numeric_features, mode="dense"):
+    if mode == "hgb" and isinstance(model, HistGradientBoostingRegressor):
+        return Pipeline(
+            [
+                ("preprocessor", build_ordinal_preprocessor(categorical_features, numeric_features)),
+                ("model", model),
+            ]
+        )
+    return Pipeline(
+        [
+            ("preprocessor", build_preprocessor(categorical_features, numeric_features, sparse=mode != "dense")),
+            ("scaler", StandardScaler(with_mean=False)),
+            ("model", model),
+        ]
+    )
+
+
+def build_models(categorical_features, numeric_features, mode="dense"):
+    """(name, pipeline) pairs: linear baseline plus the non-linear model of the mode."""
+    if mode == "hgb":
+        nonlinear = (
+            "HistGradientBoosting",
+            HistGradientBoostingRegressor(
+                categorical_features=list(range(len(categorical_features))),
+                random_state=42,
+            ),
+        )
+    else:
+        nonlinear = ("Random Forest", RandomForestRegressor(n_estimators=100, random_state=42))
+    models = [("Linear Regression", LinearRegression()), nonlinear]
+    return [(name, make_pipeline(model, categorical_features, numeric_features, mode)) for name, model in models]
+
+
 def evaluate_model(name, pipeline, X_train, X_test, y_train, y_test):
+    started = time.perf_counter()
     pipeline.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
     y_pred = pipeline.predict(X_test)
     mae = mean_absolute_error(y_test, y_pred)
     rmse = np.sqrt(mean_squared_error(y_test, y_pred))
     r2 = r2_score(y_test, y_pred)
     print(f"{name} — MAE: {mae:.0f}, RMSE: {rmse:.0f}, R²: {r2:.3f}")
-    return {"name": name, "mae": mae, "rmse": rmse, "r2": r2, "pipeline": pipeline}
+    return {"name": name, "mae": mae, "rmse": rmse, "r2": r2, "fit_seconds": fit_seconds, "pipeline": pipeline}
 
 
 def plot_feature_importance(pipeline, output_dir):
@@ -72,71 +136,92 @@ def plot_feature_importance(pipeline, output_dir):
     print("Interpretation: categorical location and experience indicators dominate salary variance.")
 
 
-def main():
-    Path(OUTPUT_DIR).mkdir(exist_ok=True)
-    sns.set_theme(style="whitegrid")
-
-    # Load preprocessed data
-    df = pd.read_csv(INPUT_FILE)
-    print("Loaded preprocessed data with shape", df.shape)
+CATEGORICAL_FEATURES = [
+    "city",
+    "employment",
+    "experience_level",
+    "payment_by",
+    "gender",
+    "degree",
+    "work_type",
+    "work_format",
+    "work_schedule_by_days",
+    "working_hours",
+    "schedule",
+]
+NUMERIC_FEATURES = ["internship", "nightshift"]
+TARGET = "salary_avg_kzt"
+# file columns the models need: experience_level is derived from experience
+INPUT_COLUMNS = [c for c in CATEGORICAL_FEATURES if c != "experience_level"] + ["experience"] + NUMERIC_FEATURES + [TARGET]
+
+
+def load_features(path):
+    """Feature matrix and target from hh_kz_preprocessed.csv/.parquet."""
+    # Load preprocessed data: only the columns the models use, with the compact dtypes of hh_schema
+    df = load_preprocessed(path, INPUT_COLUMNS)
+    print("Loaded preprocessed data with shape", df.shape, f"({memory_mb(df).sum():.1f} MB in memory)")
 
     # Feature engineering: map experience into buckets
     df["experience_level"] = df["experience"].apply(categorize_experience)
     print("Mapped raw experience text to categorical levels.")
 
-    categorical_features = [
-        "city",
-        "employment",
-        "experience_level",
-        "payment_by",
-        "gender",
-        "degree",
-        "work_type",
-        "work_format",
-        "work_schedule_by_days",
-        "working_hours",
-        "schedule",
-    ]
-    numeric_features = ["internship", "nightshift"]
-
-    X = df[categorical_features + numeric_features].copy()
-    X[categorical_features] = X[categorical_features].fillna("Unknown")
-    X[numeric_features] = X[numeric_features].fillna(0)
-    y = df["salary_avg_kzt"]
+    X = df[CATEGORICAL_FEATURES + NUMERIC_FEATURES].copy()
+    # Parquet categories reject the new "Unknown" value, so go through object first
+    X[CATEGORICAL_FEATURES] = X[CATEGORICAL_FEATURES].astype(object).fillna("Unknown")
+    X[NUMERIC_FEATURES] = X[NUMERIC_FEATURES].astype("float64").fillna(0)  # nullable boolean -> 0/1
+    return X, df[TARGET]
 
-    # Split dataset
+
+def split(X, y):
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
     print("Train/test split completed with ratio 80/20.")
+    return X_train, X_test, y_train, y_test
 
-    # Build preprocessing pipeline
-    def make_pipeline(model):
-        return Pipeline(
-            [
-                ("preprocessor", build_preprocessor(categorical_features, numeric_features)),
-                ("scaler", StandardScaler(with_mean=False)),
-                ("model", model),
-            ]
-        )
 
-    # Model 1: Linear Regression
-    lr_pipeline = make_pipeline(LinearRegression())
-    lr_metrics = evaluate_model(
-        "Linear Regression", lr_pipeline, X_train, X_test, y_train, y_test
+def train(X, y, mode="dense"):
+    """Metrics of both models of the mode (used by bench_modeling.py)."""
+    data = split(X, y)
+    return [evaluate_model(name, pipeline, *data) for name, pipeline in build_models(CATEGORICAL_FEATURES, NUMERIC_FEATURES, mode)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salary models on hh_kz_preprocessed.csv")
+    parser.add_argument("--parquet", action="store_true", help="read hh_kz_preprocessed.parquet (see hh_columnar)")
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="dense",
+        help="dense: original setup; sparse: sparse one-hot design matrix; hgb: HistGradientBoosting with native categories",
     )
-    print("Linear regression was trained to capture linear relations between encoded categories and salary.")
+    args = parser.parse_args()
+
+    Path(OUTPUT_DIR).mkdir(exist_ok=True)
+    sns.set_theme(style="whitegrid")
 
-    # Model 2: Random Forest
-    rf_pipeline = make_pipeline(RandomForestRegressor(n_estimators=100, random_state=42))
-    rf_metrics = evaluate_model(
-        "Random Forest", rf_pipeline, X_train, X_test, y_train, y_test
+    X, y = load_features(columnar_name(INPUT_FILE) if args.parquet else INPUT_FILE)
+
+    # Split dataset
+    data = split(X, y)
+    (lr_name, lr_pipeline), (nonlinear_name, nonlinear_pipeline) = build_models(
+        CATEGORICAL_FEATURES, NUMERIC_FEATURES, args.mode
     )
-    print("Random forest captures nonlinearities and interactions without manual feature transformation.")
+
+    # Model 1: Linear Regression
+    lr_metrics = evaluate_model(lr_name, lr_pipeline, *data)
+    print("Linear regression was trained to capture linear relations between encoded categories and salary.")
+
+    # Model 2: Random Forest, or HistGradientBoosting in --mode hgb
+    nonlinear_metrics = evaluate_model(nonlinear_name, nonlinear_pipeline, *data)
+    if args.mode == "hgb":
+        print("Histogram gradient boosting splits directly on category codes, so no one-hot matrix is built.")
+    else:
+        print("Random forest captures nonlinearities and interactions without manual feature transformation.")
 
     # Model comparison
     print("\nModel comparison:")
-    for metrics in [lr_metrics, rf_metrics]:
+    for metrics in [lr_metrics, nonlinear_metrics]:
         print(
             f"{metrics['name']}: MAE={metrics['mae']:.0f}, RMSE={metrics['rmse']:.0f}, R²={metrics['r2']:.3f}"
         )
@@ -144,8 +229,9 @@ def main():
         "Interpretation: compare RMSE and R² to understand whether non-linear model (RF) outperforms linear assumptions."
     )
 
-    # Random Forest feature importance
-    plot_feature_importance(rf_metrics["pipeline"], OUTPUT_DIR)
+    # Random Forest feature importance (HistGradientBoosting has no impurity-based importances)
+    if hasattr(nonlinear_metrics["pipeline"].named_steps["model"], "feature_importances_"):
+        plot_feature_importance(nonlinear_metrics["pipeline"], OUTPUT_DIR)
 
 
 if __name__ == "__main__":
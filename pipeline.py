@@ -0,0 +1,224 @@
+"""
+Весь конвейер одной командой: merge_csv → sorting_data_by_field →
+data_cleaning_preprocessing → (eda_post_preprocess ∥ modeling_pipeline).
+
+    python3 pipeline.py                 # пересчитать то, что изменилось
+    python3 pipeline.py --parquet       # промежуточные файлы в Parquet (см. hh_columnar)
+    python3 pipeline.py --force         # всё заново
+    python3 pipeline.py --jobs 1        # этапы строго по очереди
+
+У каждого этапа известны входы и выходы; порядок следует из них. Этап
+пропускается, если sha256 его входов, кода (скрипт и локальные модули,
+которые он импортирует) и аргументов не изменился с прошлого успешного
+прогона, а выходы на месте и не тронуты. Хэши файлов кэшируются по размеру
+и mtime, так что неизменные дампы не перечитываются. Независимые этапы
+идут параллельно. Вывод этапов — в .pipeline/<этап>.log, в конце — таблица
+со временем и пиковой памятью (ru_maxrss из os.wait4) каждого этапа.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from hh_columnar import columnar_name
+from hh_fx import FX_FILE
+from merge_csv import source_files
+
+WORKDIR = Path(__file__).resolve().parent
+STATE_DIR = WORKDIR / ".pipeline"
+CACHE_FILE = STATE_DIR / "cache.json"
+BLOCK = 1 << 20
+
+COMBINED = "hh_kz_combined.csv"
+SORTED = "hh_kz_sorted.csv"
+PREPROCESSED = "hh_kz_preprocessed.csv"
+
+
+def stages(parquet: bool) -> list:
+    """(имя, скрипт, аргументы, входы, выходы); входы и выходы — шаблоны glob от WORKDIR."""
+    name = columnar_name if parquet else (lambda path: path)
+    flag = ["--parquet"] if parquet else []
+    sources = [path.name for path in source_files(WORKDIR, WORKDIR / COMBINED)]
+    return [
+        ("merge", "merge_csv.py", flag, sources, [COMBINED] + ([name(COMBINED)] if parquet else [])),
+        ("sort", "sorting_data_by_field.py", flag, [name(COMBINED)], [name(SORTED)]),
+        ("clean", "data_cleaning_preprocessing.py", flag, [name(SORTED), FX_FILE], [name(PREPROCESSED)]),
+        ("eda", "eda_post_preprocess.py", flag, [name(PREPROCESSED)], ["eda_plots/*.png"]),
+        ("model", "modeling_pipeline.py", flag, [name(PREPROCESSED)], ["model_outputs/*.png"]),
+    ]
+
+
+def expand(patterns) -> list:
+    files = set()
+    for pattern in patterns:
+        files.update(path for path in WORKDIR.glob(pattern) if path.is_file())
+    return sorted(files)
+
+
+def local_imports(script: str) -> list:
+    """Скрипт и все локальные модули, которые он импортирует (рекурсивно)."""
+    found = []
+    pending = [WORKDIR / script]
+    while pending:
+        path = pending.pop()
+        if path in found or not path.exists():
+            continue
+        found.append(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            pending.extend(WORKDIR / f"{name.split('.')[0]}.py" for name in names)
+    return sorted(found)
+
+
+class Hashes:
+    """sha256 файлов с кэшем по (размер, mtime): неизменный файл не перечитывается."""
+
+    def __init__(self, known: dict):
+        self.known = known
+
+    def __call__(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path.relative_to(WORKDIR))
+        entry = self.known.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(BLOCK), b""):
+                digest.update(block)
+        self.known[key] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+
+def stage_key(stage, digest: Hashes) -> str:
+    name, script, args, inputs, _ = stage
+    files = {str(path.relative_to(WORKDIR)): digest(path) for path in expand(inputs)}
+    code = {str(path.relative_to(WORKDIR)): digest(path) for path in local_imports(script)}
+    payload = json.dumps({"args": [script] + args, "inputs": files, "code": code}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def output_digests(stage, digest: Hashes) -> dict:
+    return {str(path.relative_to(WORKDIR)): digest(path) for path in expand(stage[4])}
+
+
+def cache_name(stage) -> str:
+    """Запись кэша на этап и его аргументы: CSV- и Parquet-прогоны не вытесняют друг друга."""
+    return " ".join([stage[0]] + stage[2])
+
+
+def dependencies(all_stages) -> dict:
+    """Этап зависит от тех, чей выход назван среди его входов."""
+    produced = {name: set(outputs) for name, _, _, _, outputs in all_stages}
+    return {
+        name: {other for other, paths in produced.items() if other != name and paths & set(inputs)}
+        for name, _, _, inputs, _ in all_stages
+    }
+
+
+def run(all_stages, jobs: int, force: bool) -> list:
+    STATE_DIR.mkdir(exist_ok=True)
+    cache = json.loads(CACHE_FILE.read_text()) if CACHE_FILE.exists() else {}
+    digest = Hashes(cache.setdefault("files", {}))
+    done = cache.setdefault("stages", {})
+    deps = dependencies(all_stages)
+    by_name = {stage[0]: stage for stage in all_stages}
+
+    pending = [stage[0] for stage in all_stages]
+    running = {}  # pid → (этап, Popen, лог, начало, ключ)
+    report = []
+    failed = set()
+
+    def start(name, key):
+        stage = by_name[name]
+        log = open(STATE_DIR / f"{name}.log", "w", encoding="utf-8")
+        process = subprocess.Popen(
+            [sys.executable, stage[1]] + stage[2], cwd=WORKDIR, stdout=log, stderr=subprocess.STDOUT
+        )
+        running[process.pid] = (name, process, log, time.perf_counter(), key)
+        print(f"▶️  {name}: {stage[1]} {' '.join(stage[2])}".rstrip())
+
+    while pending or running:
+        for name in list(pending):
+            if len(running) >= jobs:
+                break
+            if deps[name] & failed:
+                pending.remove(name)
+                failed.add(name)
+                report.append((name, "пропущен", None, None))
+                continue
+            if any(dep in pending or dep in {stage for stage, *_ in running.values()} for dep in deps[name]):
+                continue
+            pending.remove(name)
+            key = stage_key(by_name[name], digest)
+            previous = done.get(cache_name(by_name[name]))
+            if (
+                not force
+                and previous
+                and previous["key"] == key
+                and previous["outputs"] == output_digests(by_name[name], digest)
+                and previous["outputs"]
+            ):
+                report.append((name, "из кэша", None, None))
+                print(f"⏭️  {name}: входы и код не менялись")
+                continue
+            start(name, key)
+
+        if not running:
+            continue
+        pid, status, usage = os.wait4(-1, 0)
+        if pid not in running:
+            continue
+        name, process, log, started, key = running.pop(pid)
+        process.returncode = code = os.waitstatus_to_exitcode(status)
+        log.close()
+        wall = time.perf_counter() - started
+        peak_mb = usage.ru_maxrss / 1024  # в Linux ru_maxrss — в КБ
+        if code == 0:
+            done[cache_name(by_name[name])] = {"key": key, "outputs": output_digests(by_name[name], digest)}
+            report.append((name, "выполнен", wall, peak_mb))
+            print(f"✅ {name}: {wall:.1f} с, пик {peak_mb:.0f} МБ")
+        else:
+            done.pop(cache_name(by_name[name]), None)
+            failed.add(name)
+            report.append((name, f"ошибка ({code})", wall, peak_mb))
+            print(f"❌ {name}: код {code}, см. {STATE_DIR.name}/{name}.log")
+        CACHE_FILE.write_text(json.dumps(cache, ensure_ascii=False, indent=1))
+
+    CACHE_FILE.write_text(json.dumps(cache, ensure_ascii=False, indent=1))
+    return report
+
+
+def print_report(report) -> None:
+    print("\nэтап     статус          время, с   пик памяти, МБ")
+    for name, status, wall, peak_mb in report:
+        wall_text = "—" if wall is None else f"{wall:.1f}"
+        peak_text = "—" if peak_mb is None else f"{peak_mb:.0f}"
+        print(f"{name:<8} {status:<15} {wall_text:>8}   {peak_text:>14}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parquet", action="store_true", help="промежуточные файлы в Parquet")
+    parser.add_argument("--force", action="store_true", help="не смотреть в кэш, выполнить все этапы")
+    parser.add_argument("--jobs", type=int, default=2, help="сколько этапов выполнять одновременно")
+    args = parser.parse_args()
+
+    report = run(stages(args.parquet), max(1, args.jobs), args.force)
+    print_report(report)
+    if any(status.startswith(("ошибка", "пропущен")) for _, status, _, _ in report):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,86 @@
-import ast
-import json
+import argparse
 import re
-from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
 
 import pandas as pd
 
+from hh_columnar import columnar_name, is_columnar, read_row_group, read_table, row_groups, write_table
+from hh_csvshard import BLOCK, iter_ranges, read_range
+from hh_extract import ExtractionPlan, load_spec
+from hh_keywords import KeywordIndex
+
 INPUT_FILE = "hh_kz_combined.csv"
 OUTPUT_FILE = "hh_kz_sorted.csv"
+SHARD_BYTES = 8 * BLOCK  # кусок hh_kz_combined.csv на одну задачу в --workers
+
+
+FEMALE_TRIGGERS = r"(?:только|требуется|нужн[аяый]?|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят)"
+MALE_TRIGGERS = r"(?:только|требуется|нужн[ый]?|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят)"
+ANY_TRIGGERS = r"(?:для|требуется|нужен|нужна|нужны|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят)"
+
+# (метка, триггер, цель): с триггером правило — regex «триггер.*цель», без него — просто «цель»;
+# порядок важен, срабатывает первое правило
+GENDER_RULES = [
+    ("female", FEMALE_TRIGGERS, r"женщ"),
+    ("female", ANY_TRIGGERS, r"женщ"),
+    ("female", None, r"женский\s+пол"),
+    ("female", None, r"\bfemale\b"),
+    ("male", MALE_TRIGGERS, r"мужч"),
+    ("male", ANY_TRIGGERS, r"мужч"),
+    ("male", None, r"мужской\s+пол"),
+    ("male", None, r"\bmale\b"),
+]
 
-
-def parse_json(x: Any) -> Any:
-    if isinstance(x, (dict, list)):
-        return x
-    if not isinstance(x, str) or not x:
-        return {}
-
-    for parser in (json.loads, ast.literal_eval):
-        try:
-            result = parser(x)
-            if isinstance(result, (dict, list)):
-                return result
-        except (ValueError, SyntaxError, json.JSONDecodeError):
-            continue
-
-    return {}
+GENDER_REGEXPS = [
+    (re.compile(target if trigger is None else f"{trigger}.*{target}", re.I), label)
+    for label, trigger, target in GENDER_RULES
+]
 
 
-def get(obj, path):
-    for p in path.split("."):
-        if isinstance(obj, list):
-            obj = obj[0] if obj else None
-        if not isinstance(obj, dict):
+class GenderMatcher:
+    """
+    Правила GENDER_RULES с тем же ответом, что у цепочки GENDER_REGEXPS, но без
+    восьми проходов и без квадратичного «.*» на длинных строках.
+
+    Любое правило срабатывает только там, где в тексте есть его цель, поэтому
+    сначала один проход сканера (?=цель|цель|…) собирает позиции всех целей;
+    нет целей — ответ сразу «any». «Триггер.*цель» срабатывает, если на строке
+    цели (`.` не захватывает \n) до её начала целиком помещается триггер: это
+    один search триггера по окну [начало строки, последняя цель на строке).
+    Самостоятельные правила проверяются якорным match в позициях целей.
+    Правила перебираются по порядку, ответ — номер первого сработавшего.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.compiled = []  # (триггер или None, цель)
+        for _, trigger, target in rules:
+            self.compiled.append((trigger and re.compile(trigger, re.I), re.compile(target, re.I)))
+        targets = list(dict.fromkeys(target for _, _, target in rules))
+        self.scan = re.compile("(?=" + "|".join(f"(?:{target})" for target in targets) + ")", re.I)
+
+    def match(self, text: str):
+        """Номер первого сработавшего правила или None."""
+        hits = [found.start() for found in self.scan.finditer(text)]
+        if not hits:
             return None
-        obj = obj.get(p)
-    return obj
-
+        for i, (trigger, target) in enumerate(self.compiled):
+            at = [pos for pos in hits if target.match(text, pos)]
+            if not at:
+                continue
+            if trigger is None:
+                return i
+            last_on_line = {}  # начало строки → последняя цель на ней
+            for pos in at:
+                last_on_line[text.rfind("\n", 0, pos) + 1] = pos
+            if any(trigger.search(text, start, end) for start, end in last_on_line.items()):
+                return i
+        return None
 
-df = pd.read_csv(INPUT_FILE, dtype=str, keep_default_na=False)
 
+GENDER_MATCHER = GenderMatcher(GENDER_RULES)
 
-GENDER_REGEXPS = [
-    (re.compile(r"(?:только|требуется|нужн[аяый]?|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят).*женщ", re.I), "female"),
-    (re.compile(r"(?:для|требуется|нужен|нужна|нужны|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят).*женщ", re.I), "female"),
-    (re.compile(r"женский\s+пол", re.I), "female"),
-    (re.compile(r"\bfemale\b", re.I), "female"),
-    (re.compile(r"(?:только|требуется|нужн[ый]?|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят).*мужч", re.I), "male"),
-    (re.compile(r"(?:для|требуется|нужен|нужна|нужны|ищем|предпочтительно|предпочитаем|приоритет|рассматрива(?:ем|ются)?|подходят).*мужч", re.I), "male"),
-    (re.compile(r"мужской\s+пол", re.I), "male"),
-    (re.compile(r"\bmale\b", re.I), "male"),
-]
 
 DEGREE_KEYWORDS = [
     ("doctor", ("доктор", "phd")),
@@ -57,10 +89,26 @@ DEGREE_KEYWORDS = [
     ("specialist", ("специалитет", "specialist degree")),
     ("higher", ("высшее", "higher education", "higher professional", "higher technical", "higher specialized")),
 ]
+DEGREE_INDEX = KeywordIndex(DEGREE_KEYWORDS, default="any")
+
+
+def gender_text(name: str, requirement: str) -> str:
+    return " ".join(filter(None, [name, requirement])).lower()
+
+
+def match_gender(name: str, requirement: str):
+    """(метка, номер сработавшего правила в GENDER_RULES или None)."""
+    rule = GENDER_MATCHER.match(gender_text(name, requirement))
+    return ("any", None) if rule is None else (GENDER_RULES[rule][0], rule)
 
 
 def detect_gender(name: str, requirement: str) -> str:
-    text = " ".join(filter(None, [name, requirement])).lower()
+    return match_gender(name, requirement)[0]
+
+
+def detect_gender_regexps(name: str, requirement: str) -> str:
+    """Исходная проверка правил по очереди — эталон для GenderMatcher."""
+    text = gender_text(name, requirement)
     for regexp, value in GENDER_REGEXPS:
         if regexp.search(text):
             return value
@@ -68,70 +116,140 @@ def detect_gender(name: str, requirement: str) -> str:
 
 
 def detect_degree(requirement: str) -> str:
-    if not requirement:
-        return "any"
-    text = requirement.lower()
-    for label, keywords in DEGREE_KEYWORDS:
-        for keyword in keywords:
-            if keyword in text:
-                return label
-    return "any"
-
-rows = []
+    return DEGREE_INDEX.best(requirement)
 
-for _, row in df.iterrows():
-    address = parse_json(row.get("address"))
-    employer = parse_json(row.get("employer"))
-    salary = parse_json(row.get("salary"))
-    salary_range = parse_json(row.get("salary_range"))
-    schedule = parse_json(row.get("schedule"))
-    snippet = parse_json(row.get("snippet"))
-    employment = parse_json(row.get("employment"))
-    experience = parse_json(row.get("experience"))
-    work_format = parse_json(row.get("work_format"))
-    work_schedule_by_days = parse_json(row.get("work_schedule_by_days"))
-    working_hours = parse_json(row.get("working_hours"))
-    vacancy_type = parse_json(row.get("type"))
-    requirement_text = get(snippet, "requirement")
+# спецификация плоской таблицы — см. hh_extract: (колонка результата, колонка
+# hh_kz_combined.csv, путь внутри JSON как у get, тип); путь None — значение как есть,
+# колонка None — поле из DERIVED, тип None — тип выведет pandas
+FIELDS = [
+    ("id", "id", None, None),
+    ("vacancy", "name", None, None),
 
-    rows.append({
-        "id": row.get("id"),
-        "vacancy": row.get("name"),
+    ("address", "address", "raw", None),
+    ("city", "address", "city", None),
 
-        "address": get(address, "raw"),
-        "city": get(address, "city"),
+    ("url", "alternate_url", None, None),
+    ("published_at", "published_at", None, None),
 
-        "url": row.get("alternate_url"),
-        "published_at": row.get("published_at"),
+    ("employer", "employer", "name", None),
+    ("employer_id", "employer", "id", None),
 
-        "employer": get(employer, "name"),
-        "employer_id": get(employer, "id"),
+    ("employment", "employment", "name", None),
+    ("experience", "experience", "name", None),
 
-        "employment": get(employment, "name"),
-        "experience": get(experience, "name"),
+    ("internship", "internship", None, None),
+    ("nightshift", "night_shifts", None, None),
 
-        "internship": row.get("internship"),
-        "nightshift": row.get("night_shifts"),
+    ("salary_from", "salary", "from", None),
+    ("salary_to", "salary", "to", None),
+    ("currency", "salary", "currency", None),
 
-        "salary_from": get(salary, "from"),
-        "salary_to": get(salary, "to"),
-        "currency": get(salary, "currency"),
+    ("payment_by", "salary_range", "frequency.id", None),
 
-        "payment_by": get(salary_range, "frequency.id"),
+    ("schedule", "schedule", "name", None),
+    ("requirement", "snippet", "requirement", None),
 
-        "schedule": get(schedule, "name"),
-        "requirement": requirement_text,
+    ("gender", None, None, None),
+    ("degree", None, None, None),
 
-        "gender": detect_gender(row.get("name"), requirement_text),
-        "degree": detect_degree(requirement_text),
-
-        "work_type": get(vacancy_type, "id"),
-        "work_format": get(work_format, "id"),
-        "work_schedule_by_days": get(work_schedule_by_days, "name"),
-        "working_hours": get(working_hours, "id"),
-    })
+    ("work_type", "type", "id", None),
+    ("work_format", "work_format", "id", None),
+    ("work_schedule_by_days", "work_schedule_by_days", "name", None),
+    ("working_hours", "working_hours", "id", None),
+]
 
-df_out = pd.DataFrame(rows)
-df_out.to_csv("hh_kz_sorted.csv", index=False)
 
-print("✅ Готово: hh_kz_sorted.csv создан")
+def cached_map(func, *columns) -> list:
+    """func по строкам, но вычисленная один раз на каждую различную комбинацию аргументов."""
+    cache = {}
+    out = []
+    for args in zip(*columns):
+        value = cache.get(args)
+        if value is None:
+            value = cache[args] = func(*args)
+        out.append(value)
+    return out
+
+
+# вычисляемые поля: имя → (входы — пары (колонка, путь), функция по их значениям)
+DERIVED = {
+    "gender": (
+        (("name", None), ("snippet", "requirement")),
+        lambda names, requirements: cached_map(detect_gender, names, requirements),
+    ),
+    "degree": (
+        (("snippet", "requirement"),),
+        lambda requirements: DEGREE_INDEX.best_column(requirements).tolist(),
+    ),
+}
+
+PLAN = ExtractionPlan(FIELDS, DERIVED)
+
+
+def flatten_columns(df: pd.DataFrame, plan: ExtractionPlan = PLAN) -> Dict[str, list]:
+    """Колонки результата списками Python-объектов, в порядке спецификации."""
+    return plan.run(df)
+
+
+def flatten(df: pd.DataFrame, plan: ExtractionPlan = PLAN) -> pd.DataFrame:
+    return plan.frame(plan.run(df))
+
+
+def flatten_shard(task) -> Dict[str, list]:
+    path, start, stop, fields = task
+    plan = PLAN if fields is None else ExtractionPlan(fields, DERIVED)
+    if stop is None:  # start — номер группы строк Parquet
+        return plan.run(read_row_group(path, start, list(plan.sources)))
+    return plan.run(read_range(path, start, stop, dtype=str, keep_default_na=False))
+
+
+def flatten_file(path: str = INPUT_FILE, workers: int = 0, fields=None) -> pd.DataFrame:
+    """
+    Плоская таблица по hh_kz_combined.csv (или .parquet — тогда читаются только
+    колонки, нужные спецификации); fields — своя спецификация вместо FIELDS.
+    С workers > 0 файл режется на куски по границам записей прямо по ходу чтения
+    (Parquet — по группам строк), куски разбираются на пуле процессов, а колонки
+    склеиваются в исходном порядке. Рабочие отдают списки, а не DataFrame, поэтому
+    типы колонок выводятся один раз на весь файл — результат тот же, что без пула.
+    """
+    plan = PLAN if fields is None else ExtractionPlan(fields, DERIVED)
+    if not workers:
+        if is_columnar(path):
+            return flatten(read_table(path, list(plan.sources)), plan)
+        return flatten(pd.read_csv(path, dtype=str, keep_default_na=False), plan)
+
+    if is_columnar(path):
+        shards = ((index, None) for index in range(row_groups(path)))
+    else:
+        shards = iter_ranges(path, SHARD_BYTES)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = ((path, start, stop, fields) for start, stop in shards)
+        shards = [pool.submit(flatten_shard, task) for task in tasks]
+        columns = {name: [] for name in plan.names}
+        for shard in shards:
+            for name, values in shard.result().items():
+                columns[name].extend(values)
+    return plan.frame(columns)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Плоская таблица нужных полей из hh_kz_combined.csv")
+    parser.add_argument("--input")
+    parser.add_argument("--output")
+    parser.add_argument("--workers", type=int, default=0, help="разбирать файл кусками на N процессах (0 — в одном)")
+    parser.add_argument("--spec", help="спецификация полей в YAML/JSON вместо FIELDS (см. hh_extract)")
+    parser.add_argument("--parquet", action="store_true", help="читать и писать .parquet вместо .csv (см. hh_columnar)")
+    args = parser.parse_args()
+
+    input_file = args.input or (columnar_name(INPUT_FILE) if args.parquet else INPUT_FILE)
+    output_file = args.output or (columnar_name(OUTPUT_FILE) if args.parquet else OUTPUT_FILE)
+    fields = load_spec(args.spec) if args.spec else None
+    plan = PLAN if fields is None else ExtractionPlan(fields, DERIVED)
+    df_out = flatten_file(input_file, args.workers, fields)
+    write_table(df_out, output_file, keep=plan.types)
+
+    print(f"✅ Готово: {output_file} создан")
+
+
+if __name__ == "__main__":
+    main()